@@ -2,65 +2,183 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .api import NukiWebApiClient
-from .const import DOMAIN
+from .account import (
+    account_store,
+    async_acquire_account,
+    async_release_account,
+    entry_smartlock_ids,
+)
+from .activity import NukiActivityLog
+from .auth import NukiAuthCoordinator
+from .bridge import NukiBridgeClient
+from .const import (
+    BRIDGE_DEFAULT_PORT,
+    CONF_ACTIVITY,
+    CONF_AUTH_SYNC,
+    CONF_BRIDGE_HOST,
+    CONF_BRIDGE_PORT,
+    CONF_BRIDGE_TOKEN,
+    CONF_PUSH,
+    DEFAULT_ACTIVITY,
+    DEFAULT_AUTH_SYNC,
+    DEFAULT_PUSH,
+    DOMAIN,
+    STORAGE_VERSION,
+)
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.LOCK, Platform.SENSOR]
-SCAN_INTERVAL = timedelta(seconds=30)
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Nuki Web API integration."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Nuki Web API from a config entry."""
-    api_token = entry.data["api_token"]
-    
-    # Create API client
-    client = NukiWebApiClient(api_token)
-    
-    # Create data update coordinator
-    async def async_update_data():
-        """Fetch data from API endpoint."""
-        try:
-            smartlocks = await client.get_smartlocks()
-            return smartlocks
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}")
-    
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="Nuki Web API",
-        update_method=async_update_data,
-        update_interval=SCAN_INTERVAL,
-    )
-    
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
-    
-    # Store client and coordinator
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        "client": client,
-        "coordinator": coordinator,
-    }
-    
-    # Set up platforms
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Client and coordinators are shared with other entries of the account
+    account = await async_acquire_account(hass, entry)
+    client = account.client
+    coordinator = account.coordinator
+    smartlock_ids = entry_smartlock_ids(entry)
+
+    bridge: NukiBridgeClient | None = None
+    activity: NukiActivityLog | None = None
+    try:
+        # Optional local bridge, tried before the Web API for the locks paired
+        # with it
+        if entry.options.get(CONF_BRIDGE_HOST) and entry.options.get(CONF_BRIDGE_TOKEN):
+            bridge = NukiBridgeClient(
+                entry.options[CONF_BRIDGE_HOST],
+                entry.options[CONF_BRIDGE_TOKEN],
+                entry.options.get(CONF_BRIDGE_PORT, BRIDGE_DEFAULT_PORT),
+            )
+            client.add_bridge(bridge)
+            entry.async_create_background_task(
+                hass, _async_list_bridge(bridge), "nuki_webapi bridge list"
+            )
+        
+        # Optional webhook push updates, polling then only reconciles slowly;
+        # one webhook serves every entry of the account
+        push = False
+        if entry.options.get(CONF_PUSH, DEFAULT_PUSH):
+            push = await account.async_enable_push(entry.entry_id)
+        
+        # Optional activity log events, fetched only after lock state changes
+        if entry.options.get(CONF_ACTIVITY, DEFAULT_ACTIVITY):
+            activity = NukiActivityLog(
+                hass, client, coordinator, _activity_store(hass, entry), smartlock_ids
+            )
+            await activity.async_setup()
+        
+        # Optional authorization sync on its own slow cadence, shared by the
+        # entries of the account
+        auth: NukiAuthCoordinator | None = None
+        if entry.options.get(CONF_AUTH_SYNC, DEFAULT_AUTH_SYNC):
+            auth = account.enable_auth_sync(entry.entry_id)
+        
+        # Store the shared client, coordinators, command queue, action tracker
+        # and authorization sync along with the bridge and activity log of this
+        # entry
+        hass.data.setdefault(DOMAIN, {})
+        hass.data[DOMAIN][entry.entry_id] = {
+            "account": account,
+            "smartlock_ids": smartlock_ids,
+            "client": client,
+            "coordinator": coordinator,
+            "metadata": account.metadata,
+            "commands": account.commands,
+            "tracker": account.tracker,
+            "bridge": bridge,
+            "push": push,
+            "activity": activity,
+            "auth": auth,
+        }
+        
+        # Set up platforms
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        # Leave the shared account as it was before this entry, so a retry
+        # or the other entries of the account are not affected
+        hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        if activity is not None:
+            await activity.async_shutdown()
+        if bridge is not None:
+            client.remove_bridge(bridge)
+            await bridge.async_close()
+        await async_release_account(hass, entry)
+        raise
+
+    # Keep the device registry up to date once the devices exist
+    account.start_metadata_sync()
+
+    # Reload when the options change
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted data of a deleted config entry.
+
+    The account snapshot is kept while other entries use the same token.
+    """
+    await _activity_store(hass, entry).async_remove()
+    if not any(
+        other.data.get("api_token") == entry.data["api_token"]
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        await account_store(hass, entry.data["api_token"]).async_remove()
+
+
+async def _async_list_bridge(bridge: NukiBridgeClient) -> None:
+    """Learn which smartlocks are paired with a bridge."""
+    try:
+        devices = await bridge.async_list()
+    except Exception as err:  # pylint: disable=broad-except
+        _LOGGER.warning(
+            "Nuki Bridge %s is not reachable, using the Web API until it is: %s",
+            bridge.host,
+            err,
+        )
+        return
+    _LOGGER.debug("Nuki Bridge %s serves %s devices", bridge.host, len(devices))
+
+
+def _activity_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store holding the activity log cursors of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.activity")
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        if data["activity"] is not None:
+            await data["activity"].async_shutdown()
+        if (bridge := data["bridge"]) is not None:
+            data["client"].remove_bridge(bridge)
+            await bridge.async_close()
+        await async_release_account(hass, entry)
     
     return unload_ok
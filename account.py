@@ -0,0 +1,291 @@
+"""Nuki accounts shared by config entries with the same API token."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import hashlib
+import logging
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry, current_entry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
+
+from .api import NukiWebApiClient
+from .auth import NukiAuthCoordinator
+from .commands import NukiCommandQueue
+from .const import (
+    CONF_CALL_BUDGET,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_SMARTLOCKS,
+    CONF_STALE_AFTER,
+    DATA_ACCOUNT_LOCKS,
+    DATA_ACCOUNTS,
+    DATA_HANDOVER,
+    DEFAULT_CALL_BUDGET,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DOMAIN,
+    HANDOVER_MAX_AGE,
+    STORAGE_VERSION,
+)
+from .coordinator import NukiDataUpdateCoordinator
+from .metadata import NukiMetadataCoordinator
+from .models import NukiSmartlock
+from .scheduler import AdaptivePollScheduler
+from .tracker import NukiActionTracker
+from .webhook import NukiWebhook
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def account_key(api_token: str) -> str:
+    """Return a stable key for an API token that does not reveal it."""
+    return hashlib.sha256(api_token.encode()).hexdigest()[:16]
+
+
+def account_store(hass: HomeAssistant, api_token: str) -> Store:
+    """Return the store holding the smartlock snapshot of an account."""
+    return Store(
+        hass, STORAGE_VERSION, f"{DOMAIN}.account_{account_key(api_token)}"
+    )
+
+
+def entry_smartlock_ids(entry: ConfigEntry) -> frozenset[int] | None:
+    """Return the smartlocks a config entry exposes, None for all."""
+    if smartlocks := entry.options.get(CONF_SMARTLOCKS):
+        return frozenset(int(smartlock_id) for smartlock_id in smartlocks)
+    return None
+
+
+def entry_smartlocks(data: dict[str, Any]) -> list[NukiSmartlock]:
+    """Return the smartlocks exposed by a loaded config entry."""
+    smartlock_ids = data["smartlock_ids"]
+    return [
+        smartlock
+        for smartlock in (data["coordinator"].data or {}).values()
+        if smartlock_ids is None or smartlock.smartlock_id in smartlock_ids
+    ]
+
+
+class NukiAccount:
+    """Client and coordinators shared by the config entries of one account.
+
+    Splitting an account into several config entries (e.g. one per
+    building) does not multiply the polling: all entries share one client,
+    rate limiter, state coordinator, metadata sync, command queue and
+    action tracker. The polling options of the entry that set the account
+    up apply until the last entry of the account is unloaded. The webhook
+    and the authorization sync are also shared; they run while at least
+    one entry of the account has them enabled.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: NukiWebApiClient,
+        scheduler: AdaptivePollScheduler,
+        store: Store,
+        stale_after: float = DEFAULT_STALE_AFTER,
+    ) -> None:
+        """Initialize the account."""
+        self.hass = hass
+        self.client = client
+        self.scheduler = scheduler
+        self.coordinator = NukiDataUpdateCoordinator(
+            hass, client, scheduler, store, stale_after
+        )
+        self.metadata = NukiMetadataCoordinator(hass, client)
+        self.commands = NukiCommandQueue(hass, client)
+        self.tracker = NukiActionTracker(hass, self.coordinator)
+        # Config entries using the account, those receiving pushes and
+        # those syncing authorizations
+        self.entries: set[str] = set()
+        self.push_entries: set[str] = set()
+        self.auth_entries: set[str] = set()
+        self.webhook: NukiWebhook | None = None
+        self.auth: NukiAuthCoordinator | None = None
+        self._unsub_metadata: CALLBACK_TYPE | None = None
+
+    def start_metadata_sync(self) -> None:
+        """Sync metadata into the device registry once devices exist.
+
+        Entries set up later only get their new devices updated from the
+        metadata already synced.
+        """
+        if self._unsub_metadata is not None:
+            self.metadata.async_update_devices()
+            return
+        self._unsub_metadata = self.metadata.async_add_listener(
+            self.metadata.async_update_devices
+        )
+        self.hass.async_create_background_task(
+            self.metadata.async_refresh(), "nuki_webapi initial metadata sync"
+        )
+
+    async def async_enable_push(self, entry_id: str) -> bool:
+        """Receive webhook pushes for an entry.
+
+        The webhook is registered with the first entry asking for it.
+        Returns False, leaving the account polling, if that failed.
+        """
+        if self.webhook is None:
+            webhook = NukiWebhook(
+                self.hass, self.client, self.coordinator, self.metadata
+            )
+            if not await webhook.async_register():
+                return False
+            self.webhook = webhook
+        self.set_push(entry_id, True)
+        return True
+
+    async def async_disable_push(self, entry_id: str) -> None:
+        """Stop pushes for an entry, unregistering the webhook with the last."""
+        self.set_push(entry_id, False)
+        if not self.push_entries and (webhook := self.webhook) is not None:
+            self.webhook = None
+            await webhook.async_unregister()
+
+    def enable_auth_sync(self, entry_id: str) -> NukiAuthCoordinator:
+        """Sync authorizations for an entry, starting the sync with the first."""
+        if self.auth is None:
+            context = current_entry.set(None)
+            try:
+                self.auth = NukiAuthCoordinator(self.hass, self.client)
+            finally:
+                current_entry.reset(context)
+            self.hass.async_create_background_task(
+                self.auth.async_refresh(), "nuki_webapi initial auth sync"
+            )
+        self.auth_entries.add(entry_id)
+        return self.auth
+
+    async def async_disable_auth_sync(self, entry_id: str) -> None:
+        """Stop syncing authorizations for an entry, and at all after the last."""
+        self.auth_entries.discard(entry_id)
+        if not self.auth_entries and (auth := self.auth) is not None:
+            self.auth = None
+            await auth.async_shutdown()
+
+    def set_push(self, entry_id: str, active: bool) -> None:
+        """Record whether an entry receives webhook pushes for the account."""
+        if active:
+            self.push_entries.add(entry_id)
+        else:
+            self.push_entries.discard(entry_id)
+
+        push_active = bool(self.push_entries)
+        if push_active == self.scheduler.push_active:
+            return
+        self.scheduler.push_active = push_active
+        self.coordinator.update_interval = (
+            self.scheduler.reconcile_interval
+            if push_active
+            else timedelta(seconds=self.scheduler.min_interval)
+        )
+
+    async def async_close(self) -> None:
+        """Stop all background work and close the client."""
+        if self._unsub_metadata is not None:
+            self._unsub_metadata()
+            self._unsub_metadata = None
+        await self.commands.async_cancel()
+        await self.tracker.async_cancel()
+        await self.coordinator.async_cancel_refreshes()
+        await self.client.async_close()
+
+
+async def async_acquire_account(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> NukiAccount:
+    """Return the account of a config entry, setting it up if needed.
+
+    The first entry of an account creates the client and coordinator,
+    reusing a client validated by the config flow when there is one, and
+    starts from the validated smartlocks or the last persisted snapshot.
+    Entries of the same account set up concurrently wait for it.
+    """
+    api_token = entry.data["api_token"]
+    locks: dict[str, asyncio.Lock] = hass.data.setdefault(DATA_ACCOUNT_LOCKS, {})
+    async with locks.setdefault(api_token, asyncio.Lock()):
+        return await _async_acquire_account(hass, entry, api_token)
+
+
+async def _async_acquire_account(
+    hass: HomeAssistant, entry: ConfigEntry, api_token: str
+) -> NukiAccount:
+    """Return the account of a config entry with the account lock held."""
+    accounts: dict[str, NukiAccount] = hass.data.setdefault(DATA_ACCOUNTS, {})
+    handover = hass.data.get(DATA_HANDOVER, {}).pop(api_token, None)
+
+    if (account := accounts.get(api_token)) is not None:
+        if handover:
+            await handover["client"].async_close()
+        _LOGGER.debug("Sharing Nuki account with %s", sorted(account.entries))
+        account.entries.add(entry.entry_id)
+        return account
+
+    # Reuse the client of a config flow that just validated this token,
+    # otherwise create an API client (owns a pooled keep-alive session
+    # until the account is closed)
+    client = handover["client"] if handover else NukiWebApiClient(api_token)
+    scheduler = AdaptivePollScheduler(
+        min_interval=entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+        max_interval=entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+        call_budget=entry.options.get(CONF_CALL_BUDGET, DEFAULT_CALL_BUDGET),
+    )
+    # Created outside of the entry's context so the shared coordinators are
+    # not shut down with the entry that happened to set them up
+    context = current_entry.set(None)
+    try:
+        account = NukiAccount(
+            hass,
+            client,
+            scheduler,
+            account_store(hass, api_token),
+            entry.options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+        )
+    finally:
+        current_entry.reset(context)
+    coordinator = account.coordinator
+
+    # Start from the validated smartlocks or the last persisted snapshot
+    # when there is one and fetch live data in the background if it is not
+    # recent, otherwise wait for the first fetch
+    if handover:
+        coordinator.async_set_smartlocks(handover["smartlocks"])
+        if time.monotonic() - handover["validated_at"] > HANDOVER_MAX_AGE:
+            hass.async_create_background_task(
+                coordinator.async_refresh(), "nuki_webapi initial refresh"
+            )
+    elif await coordinator.async_load_snapshot():
+        hass.async_create_background_task(
+            coordinator.async_refresh(), "nuki_webapi initial refresh"
+        )
+    else:
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            await client.async_close()
+            raise ConfigEntryNotReady from coordinator.last_exception
+
+    account.entries.add(entry.entry_id)
+    accounts[api_token] = account
+    return account
+
+
+async def async_release_account(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop a config entry from its account, closing it with the last one."""
+    api_token = entry.data["api_token"]
+    accounts: dict[str, NukiAccount] = hass.data.get(DATA_ACCOUNTS, {})
+    if (account := accounts.get(api_token)) is None:
+        return
+    account.entries.discard(entry.entry_id)
+    await account.async_disable_push(entry.entry_id)
+    await account.async_disable_auth_sync(entry.entry_id)
+    if not account.entries:
+        del accounts[api_token]
+        await account.async_close()
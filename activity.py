@@ -0,0 +1,260 @@
+"""Smartlock activity log ingestion for the Nuki Web API integration."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+import logging
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import NukiWebApiClient
+from .const import (
+    ACTIVITY_BUFFER_SIZE,
+    ACTIVITY_FETCH_COOLDOWN,
+    ACTIVITY_MAX_PAGES,
+    ACTIVITY_PAGE_SIZE,
+    DOMAIN,
+    EVENT_ACTIVITY,
+    SNAPSHOT_SAVE_DELAY,
+)
+from .coordinator import NukiDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def format_date(value: datetime) -> str:
+    """Format a datetime the way the Nuki Web API does."""
+    return (
+        dt_util.as_utc(value)
+        .isoformat(timespec="milliseconds")
+        .replace("+00:00", "Z")
+    )
+
+
+@dataclass
+class _Cursor:
+    """Newest log position seen for one smartlock."""
+
+    date: datetime
+    # Ids of the entries seen at exactly `date`
+    ids: set[str] = field(default_factory=set)
+
+    def is_new(self, date: datetime, log_id: str) -> bool:
+        """Return True if an entry lies after the cursor."""
+        return date > self.date or (date == self.date and log_id not in self.ids)
+
+    def advance(self, date: datetime, log_id: str) -> None:
+        """Move the cursor to an entry if it is newer."""
+        if date > self.date:
+            self.date = date
+            self.ids = {log_id}
+        elif date == self.date:
+            self.ids.add(log_id)
+
+
+class NukiActivityLog:
+    """Ingest new smartlock log entries when a lock changes state.
+
+    Regular polls never touch the log endpoints. A fetch is scheduled only
+    when the state of a smartlock changes, is delayed briefly so changes of
+    several locks share one request, and asks only for entries newer than
+    the persisted per-lock cursor. New entries are fired as
+    `nuki_webapi_activity` events and kept in a small per-lock buffer.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: NukiWebApiClient,
+        coordinator: NukiDataUpdateCoordinator,
+        store: Store,
+        smartlock_ids: frozenset[int] | None = None,
+    ) -> None:
+        """Initialize the activity log for all or only the given smartlocks."""
+        self.hass = hass
+        self.client = client
+        self.coordinator = coordinator
+        self._store = store
+        self._smartlock_ids = smartlock_ids
+        self._cursors: dict[int, _Cursor] = {}
+        self._buffers: dict[int, deque[dict[str, Any]]] = {}
+        # Last Nuki state seen per smartlock, to tell state changes apart
+        # from battery or name updates
+        self._states: dict[int, int] = {}
+        self._pending: set[int] = set()
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=ACTIVITY_FETCH_COOLDOWN,
+            immediate=False,
+            function=self._async_fetch,
+        )
+
+    async def async_setup(self) -> None:
+        """Restore the cursors and start listening for state changes.
+
+        Smartlocks without a cursor start at the current time, so no
+        history from before the integration was set up is downloaded.
+        """
+        stored = await self._store.async_load() or {}
+        now = dt_util.utcnow()
+        for smartlock_id, smartlock in (self.coordinator.data or {}).items():
+            if (
+                self._smartlock_ids is not None
+                and smartlock_id not in self._smartlock_ids
+            ):
+                continue
+            saved = stored.get(str(smartlock_id), {})
+            date = dt_util.parse_datetime(saved["date"]) if "date" in saved else None
+            self._cursors[smartlock_id] = _Cursor(
+                date or now, set(saved.get("ids", []))
+            )
+            self._buffers[smartlock_id] = deque(
+                saved.get("recent", []), maxlen=ACTIVITY_BUFFER_SIZE
+            )
+            self._states[smartlock_id] = smartlock.state
+            self._unsubs.append(
+                self.coordinator.async_add_listener(
+                    partial(self._async_handle_update, smartlock_id),
+                    context=smartlock_id,
+                )
+            )
+        self._async_save()
+
+    async def async_shutdown(self) -> None:
+        """Stop listening and drop any scheduled fetch."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._debouncer.async_cancel()
+
+    def recent(self, smartlock_id: int) -> list[dict[str, Any]]:
+        """Return the buffered log entries of a smartlock, oldest first."""
+        return list(self._buffers.get(smartlock_id, ()))
+
+    @callback
+    def _async_handle_update(self, smartlock_id: int) -> None:
+        """Schedule a fetch if the state of the smartlock changed."""
+        smartlock = (self.coordinator.data or {}).get(smartlock_id)
+        if smartlock is None or self._states.get(smartlock_id) == smartlock.state:
+            return
+        self._states[smartlock_id] = smartlock.state
+        self._pending.add(smartlock_id)
+        self.hass.async_create_task(self._debouncer.async_call())
+
+    async def _async_fetch(self) -> None:
+        """Fetch and process the log entries after the pending cursors."""
+        pending, self._pending = self._pending, set()
+        if not pending:
+            return
+
+        since = min(self._cursors[smartlock_id].date for smartlock_id in pending)
+        # One lock changed: ask for its log only, otherwise one account-wide
+        # request covers every pending lock
+        smartlock_id = next(iter(pending)) if len(pending) == 1 else None
+        try:
+            entries = await self._async_fetch_since(smartlock_id, since)
+        except aiohttp.ClientResponseError as err:
+            if err.status in (401, 403):
+                _LOGGER.warning(
+                    "The API token may not read the Nuki activity log, "
+                    "disabling activity events: %s",
+                    err,
+                )
+                await self.async_shutdown()
+                return
+            self._pending |= pending
+            _LOGGER.debug("Error fetching Nuki activity log: %s", err)
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            # Retried with the next state change
+            self._pending |= pending
+            _LOGGER.debug("Error fetching Nuki activity log: %s", err)
+            return
+
+        self._async_process(entries)
+
+    async def _async_fetch_since(
+        self, smartlock_id: int | None, since: datetime
+    ) -> list[dict[str, Any]]:
+        """Fetch all log entries from `since` on, following full pages back."""
+        entries: dict[str, dict[str, Any]] = {}
+        to_date: str | None = None
+        for _ in range(ACTIVITY_MAX_PAGES):
+            page = await self.client.get_logs(
+                smartlock_id, from_date=format_date(since), to_date=to_date
+            )
+            for entry in page:
+                entries.setdefault(entry.get("id"), entry)
+            if len(page) < ACTIVITY_PAGE_SIZE:
+                break
+            # Pages are newest first; continue before the oldest entry
+            to_date = page[-1].get("date")
+        else:
+            _LOGGER.debug("Nuki activity log truncated at %s entries", len(entries))
+        return list(entries.values())
+
+    @callback
+    def _async_process(self, entries: list[dict[str, Any]]) -> None:
+        """Fire events for entries after their cursor and advance the cursors."""
+        parsed = []
+        for entry in entries:
+            smartlock_id = entry.get("smartlockId")
+            date = dt_util.parse_datetime(entry.get("date") or "")
+            log_id = entry.get("id")
+            cursor = self._cursors.get(smartlock_id)
+            if cursor is None or date is None or log_id is None:
+                continue
+            if cursor.is_new(date, log_id):
+                parsed.append((date, smartlock_id, log_id, entry))
+
+        if not parsed:
+            return
+
+        registry = er.async_get(self.hass)
+        for date, smartlock_id, log_id, entry in sorted(
+            parsed, key=lambda item: item[0]
+        ):
+            self._cursors[smartlock_id].advance(date, log_id)
+            event = {
+                "smartlock_id": smartlock_id,
+                "entity_id": registry.async_get_entity_id(
+                    "lock", DOMAIN, f"nuki_{smartlock_id}"
+                ),
+                "log_id": log_id,
+                "date": entry.get("date"),
+                "action": entry.get("action"),
+                "trigger": entry.get("trigger"),
+                "state": entry.get("state"),
+                "auth_id": entry.get("authId"),
+                "name": entry.get("name"),
+            }
+            self._buffers[smartlock_id].append(event)
+            self.hass.bus.async_fire(EVENT_ACTIVITY, event)
+
+        _LOGGER.debug("Ingested %s Nuki activity log entries", len(parsed))
+        self._async_save()
+
+    @callback
+    def _async_save(self) -> None:
+        """Persist cursors and buffers, batching writes."""
+        self._store.async_delay_save(
+            lambda: {
+                str(smartlock_id): {
+                    "date": cursor.date.isoformat(),
+                    "ids": sorted(cursor.ids),
+                    "recent": list(self._buffers[smartlock_id]),
+                }
+                for smartlock_id, cursor in self._cursors.items()
+            },
+            SNAPSHOT_SAVE_DELAY,
+        )
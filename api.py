@@ -1,91 +1,432 @@
 """Nuki Web API client."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Collection
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlencode
 
 import aiohttp
 
-from .const import API_BASE_URL, API_TIMEOUT
+from .const import (
+    ACTION_LOCK,
+    ACTION_UNLATCH,
+    ACTION_UNLOCK,
+    ACTIVITY_PAGE_SIZE,
+    API_BASE_URL,
+    API_MAX_RETRIES,
+    API_TIMEOUT,
+    AUTH_PAGE_SIZE,
+    PATH_BRIDGE,
+    PATH_WEB_API,
+    PHASE_DECODE,
+    PHASE_HTTP,
+    SMARTLOCK_FIELDS,
+)
+from .json_codec import json_dumps, json_loads, json_loads_projected
+from .metrics import NukiMetrics
+from .profiler import profile_phase
+from .ratelimit import (
+    CIRCUIT_CLOSED,
+    BucketBlockedError,
+    get_request_guard,
+    parse_retry_after,
+    retry_delay,
+)
+from .transport import HttpTransport, NukiTransport, response_error
+
+if TYPE_CHECKING:
+    from .bridge import NukiBridgeClient
+    from .profiler import NukiProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _decode(
+    content: bytes, fields: Collection[str] | None
+) -> dict[str, Any] | list[dict[str, Any]]:
+    """Decode a JSON response, keeping only `fields` of smartlocks if given."""
+    if fields is not None:
+        return json_loads_projected(content, "smartlockId", fields)
+    return json_loads(content)
+
+
+class NukiApiError(Exception):
+    """Base error raised by the Nuki Web API client."""
+
+
+class NukiRateLimitError(NukiApiError):
+    """Error to indicate the API rejected a request with HTTP 429."""
+
+    def __init__(self, retry_after: float | None) -> None:
+        """Initialize the error."""
+        super().__init__(
+            "Rate limited by Nuki API"
+            + (f" (retry after {retry_after:.0f}s)" if retry_after is not None else "")
+        )
+        self.retry_after = retry_after
+
+
+class NukiCircuitOpenError(NukiApiError):
+    """Error to indicate requests are suspended after repeated failures."""
+
+
 class NukiWebApiClient:
     """Client to interact with Nuki Web API."""
 
-    def __init__(self, api_token: str) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        api_token: str,
+        session: aiohttp.ClientSession | None = None,
+        base_url: str = API_BASE_URL,
+        transport: NukiTransport | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        When no session is given, the client lazily creates its own pooled
+        session on the first request and closes it in async_close(). The
+        base URL can point to a local stand-in of the Nuki Web API, and a
+        transport can replace HTTP altogether (see transport.py).
+        """
         self.api_token = api_token
-        self.base_url = API_BASE_URL
+        self._transport = transport or HttpTransport(session)
+        self.metrics = NukiMetrics()
+        # Rate limiter and circuit breaker shared by every client of this token
+        self._guard = get_request_guard(api_token)
+        # GET requests in flight, shared by identical concurrent callers
+        self._inflight: dict[tuple[str, tuple[str, ...] | None], asyncio.Future] = {}
+        # Local bridges tried before the Web API for actions and state reads
+        self._bridges: list[NukiBridgeClient] = []
+        self.base_url = base_url
+        # Set by the profile service while it profiles the poll cycle
+        self.profiler: NukiProfiler | None = None
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
 
+    async def async_close(self) -> None:
+        """Close the transport and with it an HTTP session owned by the client."""
+        await self._transport.async_close()
+
+    def calls_last_hour(self) -> int:
+        """Return the number of API requests made in the last hour."""
+        return self.metrics.calls_last_hour()
+
+    def add_bridge(self, bridge: NukiBridgeClient) -> None:
+        """Route actions and state reads of the bridge's locks through it."""
+        self._bridges.append(bridge)
+
+    def remove_bridge(self, bridge: NukiBridgeClient) -> None:
+        """Stop routing requests through a bridge."""
+        if bridge in self._bridges:
+            self._bridges.remove(bridge)
+
+    async def _async_bridge_for(self, smartlock_id: int) -> NukiBridgeClient | None:
+        """Return an available bridge the smartlock is paired with."""
+        for bridge in self._bridges:
+            if not bridge.available:
+                continue
+            if not bridge.listed:
+                try:
+                    await bridge.async_list()
+                except Exception:  # pylint: disable=broad-except
+                    continue
+            if bridge.serves(smartlock_id):
+                return bridge
+        return None
+
+    @property
+    def rate_limit_state(self) -> dict[str, Any]:
+        """Return the state of the rate limiter and circuit breaker."""
+        return self._guard.as_dict()
+
     async def _request(
         self,
         method: str,
         endpoint: str,
-        data: dict[str, Any] | None = None,
+        data: dict[str, Any] | list[Any] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> dict[str, Any] | list[dict[str, Any]] | None:
+        """Make a request to the Nuki API.
+
+        Concurrent identical GET requests share a single HTTP request and
+        receive the same decoded result, which callers must not modify.
+        """
+        if method != "GET":
+            return await self._async_request(method, endpoint, data, fields)
+
+        key = (endpoint, tuple(fields) if fields is not None else None)
+        if (pending := self._inflight.get(key)) is not None:
+            self.metrics.record_coalesced(method, endpoint)
+            _LOGGER.debug("Joining GET request to %s in flight", endpoint)
+            return await asyncio.shield(pending)
+
+        future = asyncio.ensure_future(
+            self._async_request(method, endpoint, data, fields)
+        )
+        self._inflight[key] = future
+
+        def _done(task: asyncio.Future) -> None:
+            self._inflight.pop(key, None)
+            # Consume the error if every caller was cancelled meanwhile
+            if not task.cancelled():
+                task.exception()
+
+        future.add_done_callback(_done)
+        # Shielded so a cancelled caller does not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def _async_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: dict[str, Any] | list[Any] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> dict[str, Any] | list[dict[str, Any]] | None:
+        """Make a single logical request with rate limiting and retries.
+
+        Requests wait for the per-token rate limiter and fail fast while the
+        circuit breaker is open. Idempotent GET requests are retried with
+        jittered exponential backoff on HTTP 429, 5xx and network errors.
+        When `fields` is given, smartlock records in the response are
+        projected to those fields while decoding.
+        """
+        url = f"{self.base_url}{endpoint}"
+        breaker = self._guard.breaker
+        bucket = self._guard.bucket
+        attempts = API_MAX_RETRIES + 1 if method == "GET" else 1
+
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 >= attempts
+            if not breaker.allow_request():
+                raise NukiCircuitOpenError(
+                    f"Nuki API requests suspended for {breaker.retry_in:.0f}s "
+                    "after repeated failures"
+                )
+            # A cancelled trial request must not leave the circuit half-open
+            # with a trial that never finishes
+            trial = breaker.state != CIRCUIT_CLOSED
+            try:
+                try:
+                    await bucket.acquire()
+                except BucketBlockedError as err:
+                    # Held back by a Retry-After, fail now instead of queueing
+                    raise NukiRateLimitError(err.retry_after) from err
+
+                _LOGGER.debug("Making %s request to %s", method, url)
+
+                try:
+                    result = await self._async_send(method, endpoint, data, fields)
+                except NukiRateLimitError as err:
+                    # The API is up, it only wants us to slow down
+                    breaker.record_success()
+                    if err.retry_after is not None:
+                        # Honored in full, for every request on this token
+                        bucket.block(err.retry_after)
+                    elif not last_attempt:
+                        delay = retry_delay(attempt)
+                        _LOGGER.debug(
+                            "Rate limited on %s, retrying in %.1fs", url, delay
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                    _LOGGER.error("Error making request to %s: %s", url, err)
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                    transient = (
+                        not isinstance(err, aiohttp.ClientResponseError)
+                        or err.status >= 500
+                    )
+                    if transient:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    if transient and not last_attempt:
+                        delay = retry_delay(attempt)
+                        _LOGGER.debug(
+                            "Error on %s (%s), retrying in %.1fs", url, err, delay
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                    _LOGGER.error("Error making request to %s: %s", url, err)
+                    raise
+                except Exception as err:
+                    breaker.record_failure()
+                    _LOGGER.error(
+                        "Unexpected error making request to %s: %s", url, err
+                    )
+                    raise
+
+                breaker.record_success()
+                return result
+            finally:
+                if trial:
+                    breaker.release_trial()
+
+        return None
+
+    async def _async_send(
+        self,
+        method: str,
+        endpoint: str,
+        data: dict[str, Any] | list[Any] | None,
+        fields: Collection[str] | None = None,
     ) -> dict[str, Any] | list[dict[str, Any]] | None:
-        """Make a request to the Nuki API."""
+        """Send a single HTTP request, decode the response and record metrics."""
         url = f"{self.base_url}{endpoint}"
-        
-        _LOGGER.debug("Making %s request to %s", method, url)
-        
+        body = json_dumps(data) if data is not None else None
+        status: int | None = None
+        received = 0
+        error: str | None = None
+        started = time.monotonic()
+
         try:
-            timeout = aiohttp.ClientTimeout(total=API_TIMEOUT)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.request(
-                    method,
-                    url,
-                    headers=self.headers,
-                    json=data,
-                ) as response:
-                    if response.status == 204:
-                        # No content response (successful action)
-                        return None
-                    
-                    response.raise_for_status()
-                    
-                    if response.content_type == "application/json":
-                        return await response.json()
-                    
-                    return None
-                    
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Error making request to %s: %s", url, err)
-            raise
+            with profile_phase(self.profiler, PHASE_HTTP, profile=False):
+                response = await self._transport.async_send(
+                    method, url, self.headers, body, API_TIMEOUT
+                )
+            status = response.status
+            received = len(response.content)
+            retry_after = parse_retry_after(response.retry_after)
+            if response.status == 429:
+                raise NukiRateLimitError(retry_after)
+            if response.status == 503 and retry_after is not None:
+                self._guard.bucket.block(retry_after)
+
+            if response.status == 204:
+                # No content response (successful action)
+                return None
+
+            if response.status >= 400:
+                raise response_error(method, url, response)
+
+            if response.content_type == "application/json":
+                with profile_phase(self.profiler, PHASE_DECODE):
+                    return _decode(response.content, fields)
+
+            return None
         except Exception as err:
-            _LOGGER.error("Unexpected error making request to %s: %s", url, err)
+            error = type(err).__name__
             raise
+        finally:
+            self.metrics.record_request(
+                method,
+                endpoint,
+                status,
+                time.monotonic() - started,
+                len(body) if body else 0,
+                received,
+                error,
+            )
 
-    async def get_smartlocks(self) -> list[dict[str, Any]]:
-        """Get all smartlocks from the account."""
-        result = await self._request("GET", "/smartlock")
+    async def get_smartlocks(
+        self, fields: Collection[str] = SMARTLOCK_FIELDS
+    ) -> list[dict[str, Any]]:
+        """Get all smartlocks from the account, projected to `fields`."""
+        result = await self._request("GET", "/smartlock", fields=fields)
         if isinstance(result, list):
             return result
         return []
 
     async def get_smartlock(self, smartlock_id: int) -> dict[str, Any]:
-        """Get a specific smartlock."""
-        result = await self._request("GET", f"/smartlock/{smartlock_id}")
+        """Get a specific smartlock.
+
+        The state of a smartlock paired with a local bridge is read from the
+        bridge as a partial entry holding only "smartlockId" and "state",
+        falling back to the Web API if the bridge fails.
+        """
+        if (bridge := await self._async_bridge_for(smartlock_id)) is not None:
+            try:
+                result = await bridge.get_smartlock(smartlock_id)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug(
+                    "Reading Nuki lock %s from bridge %s failed, using the Web "
+                    "API: %s",
+                    smartlock_id,
+                    bridge.host,
+                    err,
+                )
+                self.metrics.record_fallback("state")
+            else:
+                self.metrics.record_path("state", PATH_BRIDGE)
+                return result
+
+        self.metrics.record_path("state", PATH_WEB_API)
+        result = await self._request(
+            "GET", f"/smartlock/{smartlock_id}", fields=SMARTLOCK_FIELDS
+        )
         if isinstance(result, dict):
             return result
         return {}
 
+    async def get_logs(
+        self,
+        smartlock_id: int | None = None,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        limit: int = ACTIVITY_PAGE_SIZE,
+    ) -> list[dict[str, Any]]:
+        """Get activity log entries, newest first.
+
+        Uses /smartlock/{id}/log for one smartlock and /smartlock/log for
+        all smartlocks of the account. Dates are RFC 3339 strings.
+        """
+        params: dict[str, Any] = {"limit": limit}
+        if from_date is not None:
+            params["fromDate"] = from_date
+        if to_date is not None:
+            params["toDate"] = to_date
+        path = (
+            "/smartlock/log"
+            if smartlock_id is None
+            else f"/smartlock/{smartlock_id}/log"
+        )
+        result = await self._request("GET", f"{path}?{urlencode(params)}")
+        if isinstance(result, list):
+            return result
+        return []
+
+    async def get_auths(
+        self, offset: int = 0, limit: int = AUTH_PAGE_SIZE
+    ) -> list[dict[str, Any]]:
+        """Get one page of the authorizations of all smartlocks."""
+        result = await self._request(
+            "GET", f"/smartlock/auth?{urlencode({'offset': offset, 'limit': limit})}"
+        )
+        if isinstance(result, list):
+            return result
+        return []
+
+    async def add_auth(self, smartlock_ids: list[int], auth: dict[str, Any]) -> None:
+        """Create the same authorization on several smartlocks in one request."""
+        await self._request(
+            "PUT", "/smartlock/auth", {**auth, "smartlockIds": smartlock_ids}
+        )
+
+    async def delete_auths(self, auth_ids: list[str]) -> None:
+        """Revoke several authorizations in one request."""
+        await self._request("DELETE", "/smartlock/auth", auth_ids)
+
     async def lock(self, smartlock_id: int) -> None:
         """Lock the smartlock."""
+        if await self._async_bridge_action(smartlock_id, ACTION_LOCK):
+            return
         await self._request("POST", f"/smartlock/{smartlock_id}/action/lock")
 
     async def unlock(self, smartlock_id: int) -> None:
         """Unlock the smartlock."""
+        if await self._async_bridge_action(smartlock_id, ACTION_UNLOCK):
+            return
         await self._request("POST", f"/smartlock/{smartlock_id}/action/unlock")
 
     async def unlatch(self, smartlock_id: int) -> None:
         """Unlatch the smartlock (open door)."""
+        if await self._async_bridge_action(smartlock_id, ACTION_UNLATCH):
+            return
         await self._request("POST", f"/smartlock/{smartlock_id}/action/unlatch")
 
     async def lock_n_go(self, smartlock_id: int, unlatch: bool = False) -> None:
@@ -96,4 +437,65 @@ class NukiWebApiClient:
         5 = lock'n'go with unlatch
         """
         action_code = 5 if unlatch else 4
-        await self._request("POST", f"/smartlock/{smartlock_id}/action", {"action": action_code})
+        await self.action(smartlock_id, action_code)
+
+    async def action(self, smartlock_id: int, action: int) -> None:
+        """Send an action code (see ACTION_* in const.py) to the smartlock."""
+        if await self._async_bridge_action(smartlock_id, action):
+            return
+        await self._request("POST", f"/smartlock/{smartlock_id}/action", {"action": action})
+
+    async def _async_bridge_action(self, smartlock_id: int, action: int) -> bool:
+        """Send an action through a local bridge if the smartlock has one.
+
+        Returns False if the action has to go through the Web API instead.
+        A bridge that failed may still have passed the action on, so it
+        can reach the lock twice; actions lead to the same state either way.
+        """
+        if (bridge := await self._async_bridge_for(smartlock_id)) is None:
+            self.metrics.record_path("action", PATH_WEB_API)
+            return False
+        try:
+            await bridge.action(smartlock_id, action)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning(
+                "Sending action %s to Nuki lock %s through bridge %s failed, "
+                "using the Web API: %s",
+                action,
+                smartlock_id,
+                bridge.host,
+                err,
+            )
+            self.metrics.record_fallback("action")
+            self.metrics.record_path("action", PATH_WEB_API)
+            return False
+        _LOGGER.debug(
+            "Sent action %s to Nuki lock %s through bridge %s",
+            action,
+            smartlock_id,
+            bridge.host,
+        )
+        self.metrics.record_path("action", PATH_BRIDGE)
+        return True
+
+    async def register_webhook(
+        self, webhook_url: str, features: list[str]
+    ) -> dict[str, Any]:
+        """Register a decentral webhook and return its id and signing secret."""
+        result = await self._request(
+            "PUT",
+            "/api/decentralWebhook",
+            {"webhookUrl": webhook_url, "webhookFeatures": features},
+        )
+        if isinstance(result, dict):
+            return result
+        return {}
+
+    async def get_webhooks(self) -> list[dict[str, Any]]:
+        """Return the decentral webhooks registered with the API token."""
+        result = await self._request("GET", "/api/decentralWebhook")
+        return result if isinstance(result, list) else []
+
+    async def delete_webhook(self, webhook_id: int) -> None:
+        """Unregister a decentral webhook."""
+        await self._request("DELETE", f"/api/decentralWebhook/{webhook_id}")
@@ -0,0 +1,122 @@
+"""Authorization sync for the Nuki Web API integration."""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import NukiWebApiClient
+from .const import (
+    AUTH_CACHE_TTL,
+    AUTH_MAX_PAGES,
+    AUTH_PAGE_SIZE,
+    AUTH_SYNC_INTERVAL,
+    AUTH_TYPE_NAMES,
+)
+from .models import NukiAuth
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NukiAuthCoordinator(DataUpdateCoordinator[dict[int, dict[str, NukiAuth]]]):
+    """Coordinator holding the authorizations of one Nuki account.
+
+    Runs on its own slow cadence, independent of the smartlock state
+    coordinator, and pages through /smartlock/auth. Listeners are only
+    notified when an authorization was added, removed or changed. The
+    services trust the synced list for AUTH_CACHE_TTL seconds and refresh
+    it after changing authorizations.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: NukiWebApiClient) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Nuki Web API authorizations",
+            update_interval=timedelta(seconds=AUTH_SYNC_INTERVAL),
+            always_update=False,
+        )
+        self.client = client
+        self._synced_at: float | None = None
+
+    async def _async_update_data(self) -> dict[int, dict[str, NukiAuth]]:
+        """Fetch all authorization pages."""
+        try:
+            entries = await self._async_fetch_pages()
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching authorizations: {err}") from err
+
+        data: dict[int, dict[str, NukiAuth]] = {}
+        for auth in map(NukiAuth.from_api, entries):
+            data.setdefault(auth.smartlock_id, {})[auth.auth_id] = auth
+
+        if self.data is not None and data != self.data:
+            _LOGGER.debug(
+                "Authorizations changed on smartlocks %s",
+                sorted(
+                    smartlock_id
+                    for smartlock_id in data.keys() | self.data.keys()
+                    if data.get(smartlock_id) != self.data.get(smartlock_id)
+                ),
+            )
+        self._synced_at = self.hass.loop.time()
+        return data
+
+    async def _async_fetch_pages(self) -> list[dict[str, Any]]:
+        """Page through /smartlock/auth until a short or repeated page."""
+        entries: dict[str, dict[str, Any]] = {}
+        for page in range(AUTH_MAX_PAGES):
+            result = await self.client.get_auths(offset=page * AUTH_PAGE_SIZE)
+            added = 0
+            for entry in result:
+                if entry.get("id") is not None and entry["id"] not in entries:
+                    entries[entry["id"]] = entry
+                    added += 1
+            # A server that ignores paging returns the same entries again
+            if len(result) < AUTH_PAGE_SIZE or not added:
+                break
+        else:
+            _LOGGER.warning(
+                "Stopped syncing Nuki authorizations after %s entries", len(entries)
+            )
+        return list(entries.values())
+
+    @property
+    def is_fresh(self) -> bool:
+        """Return True if the synced list is younger than AUTH_CACHE_TTL."""
+        return (
+            self._synced_at is not None
+            and self.last_update_success
+            and self.hass.loop.time() - self._synced_at < AUTH_CACHE_TTL
+        )
+
+    async def async_ensure_fresh(self) -> None:
+        """Sync now unless the cached list is still fresh."""
+        if not self.is_fresh:
+            await self.async_refresh()
+
+    def auths(self, smartlock_id: int | None = None) -> list[NukiAuth]:
+        """Return the cached authorizations of one or all smartlocks."""
+        if self.data is None:
+            return []
+        if smartlock_id is not None:
+            return list(self.data.get(smartlock_id, {}).values())
+        return [auth for auths in self.data.values() for auth in auths.values()]
+
+    def summary(self, smartlock_id: int | None = None) -> dict[str, int]:
+        """Return authorization counts of one or all smartlocks."""
+        auths = self.auths(smartlock_id)
+        types = Counter(
+            AUTH_TYPE_NAMES.get(auth.auth_type, "other") for auth in auths
+        )
+        return {
+            "total": len(auths),
+            "enabled": sum(auth.enabled for auth in auths),
+            "remote_allowed": sum(auth.remote_allowed for auth in auths),
+            **{name: types.get(name, 0) for name in AUTH_TYPE_NAMES.values()},
+        }
@@ -0,0 +1 @@
+"""Benchmarks for the Nuki Web API integration against a local fake API."""
@@ -0,0 +1,450 @@
+"""Benchmarks for the Nuki Web API integration.
+
+Runs the client, coordinator and lock entity against a local stand-in of
+api.nuki.io and prints the results as JSON. Run from the directory that
+contains the integration (usually ``custom_components``):
+
+    python -m nuki_webapi.benchmarks --sizes 1 10 100 1000 --output new.json
+    python -m nuki_webapi.benchmarks --compare old.json new.json
+
+Instead of the HTTP stand-in, the client can use a synthetic in-process
+fleet or replay recorded traffic (see transport.py), and real traffic of
+an account can be recorded:
+
+    python -m nuki_webapi.benchmarks --transport synthetic --sizes 1000 --entities
+    python -m nuki_webapi.benchmarks --record traffic.jsonl.gz --token TOKEN
+    python -m nuki_webapi.benchmarks --transport replay --replay traffic.jsonl.gz
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from ..api import NukiWebApiClient
+from ..commands import NukiCommandQueue
+from ..const import (
+    DEFAULT_CALL_BUDGET,
+    DEFAULT_MAX_INTERVAL,
+    DOMAIN,
+    SMARTLOCK_FIELDS,
+    STORAGE_VERSION,
+)
+from ..coordinator import NukiDataUpdateCoordinator
+from ..json_codec import JSON_DECODER, json_loads, json_loads_projected
+from ..lock import NukiLock
+from ..scheduler import AdaptivePollScheduler
+from ..tracker import NukiActionTracker
+from ..transport import (
+    HttpTransport,
+    RecordingTransport,
+    ReplayTransport,
+    SyntheticTransport,
+    load_templates,
+)
+from .fake_api import FakeApiConfig, make_fleet, start_fake_api
+
+# Keep periodic polls out of the measurements
+BENCHMARK_POLL_INTERVAL = 3600
+
+# Relative change above which --compare reports a regression
+REGRESSION_THRESHOLD = 0.10
+# Metrics where lower is better
+COMPARED_SUFFIXES = ("_ms", "_kb", "requests_per_cycle", "requests_per_action")
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    """Return mean/p95/min/max of samples given in seconds, in ms."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * len(ordered)) - 1)]
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _make_coordinator(
+    hass: HomeAssistant, client: NukiWebApiClient, name: str
+) -> NukiDataUpdateCoordinator:
+    """Create a coordinator that does not poll on its own."""
+    scheduler = AdaptivePollScheduler(
+        min_interval=BENCHMARK_POLL_INTERVAL,
+        max_interval=max(BENCHMARK_POLL_INTERVAL, DEFAULT_MAX_INTERVAL),
+        call_budget=DEFAULT_CALL_BUDGET,
+    )
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.benchmark_{name}")
+    return NukiDataUpdateCoordinator(hass, client, scheduler, store)
+
+
+async def _start_client(
+    args: argparse.Namespace, fleet_size: int
+) -> tuple[NukiWebApiClient, Callable[[], Awaitable[None]]]:
+    """Return a client for the selected transport and a cleanup function."""
+    if args.transport == "synthetic":
+        transport = SyntheticTransport(
+            fleet_size,
+            templates=load_templates(args.template) if args.template else None,
+            latency=args.latency,
+            churn=args.churn,
+            action_duration=args.action_duration,
+        )
+        client = NukiWebApiClient("benchmark", transport=transport)
+        return client, client.async_close
+    if args.transport == "replay":
+        client = NukiWebApiClient(
+            "benchmark", transport=ReplayTransport(args.replay, args.speed)
+        )
+        return client, client.async_close
+
+    _, runner, base_url = await start_fake_api(
+        FakeApiConfig(
+            fleet_size=fleet_size,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            action_duration=args.action_duration,
+        )
+    )
+    client = NukiWebApiClient("benchmark", base_url=base_url)
+
+    async def cleanup() -> None:
+        await client.async_close()
+        await runner.cleanup()
+
+    return client, cleanup
+
+
+def _total_requests(client: NukiWebApiClient) -> int:
+    """Return the number of HTTP requests the client made so far."""
+    return sum(stats.requests for stats in client.metrics.endpoints.values())
+
+
+async def _add_lock_entities(
+    hass: HomeAssistant, coordinator: NukiDataUpdateCoordinator
+) -> list[NukiLock]:
+    """Attach a lock entity to every smartlock of the coordinator."""
+    client = coordinator.client
+    commands = NukiCommandQueue(hass, client)
+    tracker = NukiActionTracker(hass, coordinator)
+    locks = []
+    for smartlock_id, smartlock in coordinator.data.items():
+        lock = NukiLock(coordinator, commands, tracker, smartlock)
+        lock.hass = hass
+        lock.entity_id = f"lock.nuki_benchmark_{smartlock_id}"
+        await lock.async_added_to_hass()
+        locks.append(lock)
+    return locks
+
+
+def bench_json_decode(args: argparse.Namespace, fleet_size: int) -> dict[str, Any]:
+    """Compare decoding a /smartlock body with the stdlib and the client codec."""
+    body = json.dumps(list(make_fleet(fleet_size).values())).encode()
+
+    def timed(decode) -> list[float]:
+        samples = []
+        for _ in range(args.cycles):
+            started = time.perf_counter()
+            decode()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    before = timed(lambda: json.loads(body))
+    after = timed(lambda: json_loads(body))
+    projected = timed(
+        lambda: json_loads_projected(body, "smartlockId", SMARTLOCK_FIELDS)
+    )
+    return {
+        "benchmark": "json_decode",
+        "fleet_size": fleet_size,
+        "decoder": JSON_DECODER,
+        "body_kb": round(len(body) / 1024, 1),
+        "stdlib_ms": _summary(before)["mean_ms"],
+        "codec_ms": _summary(after)["mean_ms"],
+        "projected_ms": _summary(projected)["mean_ms"],
+    }
+
+
+async def bench_poll_cycle(
+    hass: HomeAssistant, args: argparse.Namespace, fleet_size: int
+) -> dict[str, Any]:
+    """Measure full poll cycles and their memory for one fleet size.
+
+    With --entities, a lock entity per smartlock listens to the coordinator
+    and the state writes caused by the polls are counted.
+    """
+    client, cleanup = await _start_client(args, fleet_size)
+    coordinator = _make_coordinator(hass, client, f"poll_{fleet_size}")
+    state_writes = 0
+
+    def count_write(_event: Any) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+    try:
+        # Warm up the connection pool
+        await coordinator.async_refresh()
+        if args.entities:
+            await _add_lock_entities(hass, coordinator)
+            await hass.async_block_till_done()
+            state_writes = 0
+
+        durations = []
+        for _ in range(args.cycles):
+            started = time.perf_counter()
+            await coordinator.async_refresh()
+            durations.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await coordinator.async_refresh()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "benchmark": "poll_cycle",
+            "fleet_size": fleet_size,
+            "cycles": args.cycles,
+            **_summary(durations),
+            "peak_memory_kb": round((peak - baseline) / 1024, 1),
+            "retained_memory_kb": round((retained - baseline) / 1024, 1),
+            "requests_per_cycle": round(
+                _total_requests(client) / (args.cycles + 2), 2
+            ),
+            "failed_cycles": client.metrics.poll_failures,
+            **(
+                {"state_writes_per_cycle": round(state_writes / (args.cycles + 1), 2)}
+                if args.entities
+                else {}
+            ),
+        }
+    finally:
+        unsub()
+        await cleanup()
+
+
+async def bench_action(
+    hass: HomeAssistant, args: argparse.Namespace, fleet_size: int
+) -> dict[str, Any]:
+    """Measure action-to-state latency through NukiLock."""
+    client, cleanup = await _start_client(args, fleet_size)
+    coordinator = _make_coordinator(hass, client, f"action_{fleet_size}")
+    tracker = NukiActionTracker(hass, coordinator)
+    commands = NukiCommandQueue(hass, client)
+    try:
+        await coordinator.async_refresh()
+        smartlock_id = next(iter(coordinator.data))
+        lock = NukiLock(
+            coordinator, commands, tracker, coordinator.data[smartlock_id]
+        )
+        lock.hass = hass
+        lock.entity_id = "lock.nuki_benchmark"
+        await lock.async_added_to_hass()
+
+        post_latencies = []
+        state_latencies = []
+        requests = []
+        timeouts = 0
+        for index in range(args.actions):
+            expect_locked = index % 2 == 1
+            before = _total_requests(client)
+            started = time.perf_counter()
+            if expect_locked:
+                await lock.async_lock()
+            else:
+                await lock.async_unlock()
+            post_latencies.append(time.perf_counter() - started)
+
+            deadline = started + args.action_timeout
+            while lock.is_locked is not expect_locked:
+                if time.perf_counter() > deadline:
+                    timeouts += 1
+                    break
+                await asyncio.sleep(0.01)
+            else:
+                state_latencies.append(time.perf_counter() - started)
+            requests.append(_total_requests(client) - before)
+
+        return {
+            "benchmark": "action_to_state",
+            "fleet_size": fleet_size,
+            "actions": args.actions,
+            "action_duration_s": args.action_duration,
+            "post": _summary(post_latencies),
+            **(_summary(state_latencies) if state_latencies else {}),
+            "requests_per_action": round(statistics.fmean(requests), 2),
+            "timeouts": timeouts,
+        }
+    finally:
+        await commands.async_cancel()
+        await tracker.async_cancel()
+        await cleanup()
+
+
+def _index_results(report: dict[str, Any]) -> dict[tuple[str, int], dict[str, Any]]:
+    """Key the results of a report by benchmark and fleet size."""
+    return {
+        (result["benchmark"], result["fleet_size"]): result
+        for result in report["results"]
+    }
+
+
+def compare(old_path: str, new_path: str) -> int:
+    """Print the relative change between two result files.
+
+    Returns 1 if any timing, memory or request count got worse by more
+    than REGRESSION_THRESHOLD.
+    """
+    with open(old_path, encoding="utf-8") as file:
+        old = _index_results(json.load(file))
+    with open(new_path, encoding="utf-8") as file:
+        new = _index_results(json.load(file))
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        for metric, old_value in old[key].items():
+            new_value = new[key].get(metric)
+            if (
+                not isinstance(old_value, (int, float))
+                or not isinstance(new_value, (int, float))
+                or not metric.endswith(COMPARED_SUFFIXES)
+                or old_value == 0
+            ):
+                continue
+            change = (new_value - old_value) / old_value
+            flag = ""
+            if change > REGRESSION_THRESHOLD:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(
+                f"{key[0]:<16} n={key[1]:<5} {metric:<24} "
+                f"{old_value:>10} -> {new_value:>10} ({change:+.1%}){flag}"
+            )
+    return 1 if regressions else 0
+
+
+async def async_record(args: argparse.Namespace) -> int:
+    """Record the /smartlock polls of a real account to a file."""
+    client = NukiWebApiClient(
+        args.token, transport=RecordingTransport(HttpTransport(), args.record)
+    )
+    try:
+        for cycle in range(args.cycles):
+            if cycle:
+                await asyncio.sleep(args.record_interval)
+            smartlocks = await client.get_smartlocks()
+            print(f"Poll {cycle + 1}/{args.cycles}: {len(smartlocks)} smartlocks")
+    finally:
+        await client.async_close()
+    print(f"Recorded {_total_requests(client)} requests to {args.record}")
+    return 0
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run all benchmarks and return the results."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        results = []
+        try:
+            for fleet_size in args.sizes:
+                results.append(bench_json_decode(args, fleet_size))
+                results.append(await bench_poll_cycle(hass, args, fleet_size))
+            for fleet_size in args.action_sizes:
+                results.append(await bench_action(hass, args, fleet_size))
+        finally:
+            await hass.async_stop(force=True)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_s": args.latency,
+            "error_rate": args.error_rate,
+            "json_decoder": JSON_DECODER,
+            "transport": args.transport,
+        },
+        "results": results,
+    }
+
+
+def main() -> int:
+    """Parse arguments and run the benchmarks or a comparison."""
+    parser = argparse.ArgumentParser(description="Nuki Web API benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--action-sizes", type=int, nargs="*", default=[10])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--actions", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--action-duration", type=float, default=1.0)
+    parser.add_argument("--action-timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--transport",
+        choices=("http", "synthetic", "replay"),
+        default="http",
+        help="HTTP stand-in, in-process synthetic fleet or recorded traffic",
+    )
+    parser.add_argument("--replay", help="recording used by --transport replay")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="replay speed, 1 = real time, 0 = no delays",
+    )
+    parser.add_argument(
+        "--template", help="JSON list of /smartlock entries or a recording"
+    )
+    parser.add_argument(
+        "--churn",
+        type=float,
+        default=0.0,
+        help="share of synthetic locks changing per poll",
+    )
+    parser.add_argument(
+        "--entities",
+        action="store_true",
+        help="attach a lock entity to every smartlock",
+    )
+    parser.add_argument("--record", help="record real /smartlock polls to this file")
+    parser.add_argument("--token", help="Nuki Web API token used by --record")
+    parser.add_argument("--record-interval", type=float, default=30.0)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+    if args.record:
+        if not args.token:
+            parser.error("--record needs --token")
+        return asyncio.run(async_record(args))
+    if args.transport == "replay" and not args.replay:
+        parser.error("--transport replay needs --replay")
+
+    report = asyncio.run(async_run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
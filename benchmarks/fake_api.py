@@ -0,0 +1,135 @@
+"""Local stand-in for api.nuki.io used by the benchmarks.
+
+Serves `/smartlock`, `/smartlock/{id}` and the action endpoints for a
+synthetic fleet. Actions move a lock through its transitional state before
+it settles, so the action tracker sees realistic state sequences.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import random
+import re
+import time
+from typing import Any
+
+from aiohttp import web
+
+from ..transport import ACTION_NAMES, ACTION_STATES, make_smartlock
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+@dataclass
+class FakeApiConfig:
+    """Behaviour of the stand-in server."""
+
+    fleet_size: int = 10
+    # Added to every response, in seconds
+    latency: float = 0.0
+    # Probability of answering with HTTP 503
+    error_rate: float = 0.0
+    # Seconds a lock spends in the transitional state after an action
+    action_duration: float = 1.0
+    seed: int = 0
+
+
+def make_fleet(fleet_size: int) -> dict[int, dict[str, Any]]:
+    """Return the smartlocks of the stand-in by id."""
+    return {
+        (4 << 32) + index: make_smartlock(
+            (4 << 32) + index, f"Benchmark Lock {index}", 1000 + index
+        )
+        for index in range(1, fleet_size + 1)
+    }
+
+
+class FakeNukiApi:
+    """Stateful fake of the Nuki Web API smartlock endpoints."""
+
+    def __init__(self, config: FakeApiConfig) -> None:
+        """Initialize the fake fleet."""
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests: Counter[str] = Counter()
+        self.smartlocks = make_fleet(config.fleet_size)
+        self._transitions: set[asyncio.Task] = set()
+
+    @property
+    def total_requests(self) -> int:
+        """Return the number of requests served so far."""
+        return sum(self.requests.values())
+
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/smartlock", self._get_smartlocks)
+        app.router.add_get("/smartlock/{smartlock_id:\\d+}", self._get_smartlock)
+        app.router.add_post(
+            "/smartlock/{smartlock_id:\\d+}/action/{name}", self._post_named_action
+        )
+        app.router.add_post("/smartlock/{smartlock_id:\\d+}/action", self._post_action)
+        app.on_shutdown.append(self._on_shutdown)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count requests and inject latency and errors."""
+        self.requests[f"{request.method} {_ID_SEGMENT.sub('/{id}', request.path)}"] += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        if self.config.error_rate and self.random.random() < self.config.error_rate:
+            return web.Response(status=503)
+        return await handler(request)
+
+    async def _get_smartlocks(self, request: web.Request) -> web.Response:
+        return web.json_response(list(self.smartlocks.values()))
+
+    async def _get_smartlock(self, request: web.Request) -> web.Response:
+        smartlock = self.smartlocks.get(int(request.match_info["smartlock_id"]))
+        if smartlock is None:
+            return web.Response(status=404)
+        return web.json_response(smartlock)
+
+    async def _post_named_action(self, request: web.Request) -> web.Response:
+        action = ACTION_NAMES.get(request.match_info["name"])
+        if action is None:
+            return web.Response(status=404)
+        return self._start_action(int(request.match_info["smartlock_id"]), action)
+
+    async def _post_action(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        return self._start_action(int(request.match_info["smartlock_id"]), data["action"])
+
+    def _start_action(self, smartlock_id: int, action: int) -> web.Response:
+        smartlock = self.smartlocks.get(smartlock_id)
+        if smartlock is None or action not in ACTION_STATES:
+            return web.Response(status=400)
+        transitional, final = ACTION_STATES[action]
+        smartlock["state"] = {**smartlock["state"], "state": transitional}
+        task = asyncio.create_task(self._settle(smartlock_id, final))
+        self._transitions.add(task)
+        task.add_done_callback(self._transitions.discard)
+        return web.Response(status=204)
+
+    async def _settle(self, smartlock_id: int, final: int) -> None:
+        await asyncio.sleep(self.config.action_duration)
+        smartlock = self.smartlocks[smartlock_id]
+        smartlock["state"] = {**smartlock["state"], "state": final}
+        smartlock["updateDate"] = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+
+    async def _on_shutdown(self, app: web.Application) -> None:
+        for task in list(self._transitions):
+            task.cancel()
+
+
+async def start_fake_api(config: FakeApiConfig) -> tuple[FakeNukiApi, web.AppRunner, str]:
+    """Start the stand-in on a free local port and return its base URL."""
+    api = FakeNukiApi(config)
+    runner = web.AppRunner(api.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    return api, runner, f"http://127.0.0.1:{port}"
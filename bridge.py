@@ -0,0 +1,211 @@
+"""Local Nuki Bridge HTTP API client for the Nuki Web API integration."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from typing import Any
+
+import aiohttp
+
+from .api import NukiApiError
+from .const import BRIDGE_DEFAULT_PORT, BRIDGE_RETRY_INTERVAL, BRIDGE_TIMEOUT
+from .json_codec import json_loads
+from .metrics import NukiMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fields of a bridge lastKnownState kept as Web API state fields
+_STATE_FIELDS = ("state", "batteryCritical", "batteryCharging", "batteryChargeState")
+
+
+class NukiBridgeError(NukiApiError):
+    """Error to indicate the bridge failed or refused a request."""
+
+
+def nuki_id(smartlock_id: int) -> int:
+    """Return the bridge nukiId of a Web API smartlockId.
+
+    The smartlockId is the nukiId prefixed with the device type in its
+    hexadecimal form, i.e. the device type sits above the low 32 bits.
+    """
+    return smartlock_id & 0xFFFFFFFF
+
+
+class NukiBridgeClient:
+    """Client for the HTTP API of a Nuki Bridge on the local network.
+
+    The bridge handles one request at a time, so requests are serialized
+    and concurrent device list reads share one request. Requests are
+    authenticated with a hashed token, the plain token never goes over the
+    network. After a failed request the bridge is reported unavailable for
+    BRIDGE_RETRY_INTERVAL so callers go to the Web API right away.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        token: str,
+        port: int = BRIDGE_DEFAULT_PORT,
+        session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        """Initialize the bridge client."""
+        self.host = host
+        self.base_url = f"http://{host}:{port}"
+        self._token = token
+        self._session = session
+        self._owns_session = session is None
+        # Bridge requests do not count against the Web API call budget
+        self.metrics = NukiMetrics()
+        self._lock = asyncio.Lock()
+        # Paired devices by nukiId, None until the first list succeeded
+        self._devices: dict[int, dict[str, Any]] | None = None
+        self._listing: asyncio.Future | None = None
+        self._retry_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Return False while the bridge is skipped after a failure."""
+        return time.monotonic() >= self._retry_at
+
+    @property
+    def listed(self) -> bool:
+        """Return True once the paired devices are known."""
+        return self._devices is not None
+
+    def serves(self, smartlock_id: int) -> bool:
+        """Return True if the smartlock is paired with the bridge."""
+        return self._devices is not None and nuki_id(smartlock_id) in self._devices
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the bridge in a JSON friendly form."""
+        return {
+            "available": self.available,
+            "devices": sorted(self._devices) if self._devices is not None else None,
+            "retry_in": max(0.0, round(self._retry_at - time.monotonic(), 1)),
+            "metrics": self.metrics.as_dict(),
+        }
+
+    async def async_close(self) -> None:
+        """Close the HTTP session if it is owned by this client."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    async def async_list(self) -> list[dict[str, Any]]:
+        """Return the paired devices with their last known state.
+
+        The bridge keeps the state from the locks' advertisements, so this
+        does not wake a lock up.
+        """
+        if self._listing is None:
+            self._listing = asyncio.ensure_future(self._request("/list"))
+            self._listing.add_done_callback(self._listing_done)
+        result = await asyncio.shield(self._listing)
+        if not isinstance(result, list):
+            raise NukiBridgeError(f"Unexpected /list response from {self.host}")
+        self._devices = {device["nukiId"]: device for device in result}
+        return result
+
+    def _listing_done(self, future: asyncio.Future) -> None:
+        """Let the next read start a new list request."""
+        self._listing = None
+        # Consume the error if every caller was cancelled meanwhile
+        if not future.cancelled():
+            future.exception()
+
+    async def get_smartlock(self, smartlock_id: int) -> dict[str, Any]:
+        """Return the state of a smartlock as a partial /smartlock entry."""
+        await self.async_list()
+        device = self._device(smartlock_id)
+        state = device.get("lastKnownState") or {}
+        return {
+            "smartlockId": smartlock_id,
+            "state": {key: state[key] for key in _STATE_FIELDS if key in state},
+        }
+
+    async def action(self, smartlock_id: int, action: int) -> None:
+        """Send an action code (see ACTION_* in const.py) to the smartlock.
+
+        Returns once the bridge accepted the action, without waiting for
+        the lock to execute it.
+        """
+        device = self._device(smartlock_id)
+        result = await self._request(
+            "/lockAction",
+            {
+                "nukiId": device["nukiId"],
+                "deviceType": device.get("deviceType", 0),
+                "action": action,
+                "nowait": 1,
+            },
+        )
+        if not isinstance(result, dict) or not result.get("success"):
+            raise NukiBridgeError(
+                f"Bridge {self.host} refused action {action} for {smartlock_id}"
+            )
+
+    def _device(self, smartlock_id: int) -> dict[str, Any]:
+        """Return the listed device of a smartlock."""
+        if self._devices is None or (
+            device := self._devices.get(nuki_id(smartlock_id))
+        ) is None:
+            raise NukiBridgeError(f"Smartlock {smartlock_id} is not paired")
+        return device
+
+    def _auth_params(self) -> dict[str, Any]:
+        """Return the hashed token parameters of a request."""
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        rnr = secrets.randbelow(65536)
+        digest = hashlib.sha256(f"{timestamp},{rnr},{self._token}".encode())
+        return {"ts": timestamp, "rnr": rnr, "hash": digest.hexdigest()}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating one if needed."""
+        if self._session is None or self._session.closed:
+            # The bridge closes idle connections quickly, do not keep any
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=1, force_close=True)
+            )
+            self._owns_session = True
+        return self._session
+
+    async def _request(
+        self, endpoint: str, params: dict[str, Any] | None = None
+    ) -> Any:
+        """Make a request to the bridge and record it in the metrics."""
+        status: int | None = None
+        received = 0
+        error: str | None = None
+        async with self._lock:
+            started = time.monotonic()
+            try:
+                async with self._get_session().get(
+                    f"{self.base_url}{endpoint}",
+                    params={**(params or {}), **self._auth_params()},
+                    timeout=aiohttp.ClientTimeout(total=BRIDGE_TIMEOUT),
+                ) as response:
+                    status = response.status
+                    response.raise_for_status()
+                    content = await response.read()
+                    received = len(content)
+                    result = json_loads(content)
+            except Exception as err:
+                error = type(err).__name__
+                self._retry_at = time.monotonic() + BRIDGE_RETRY_INTERVAL
+                _LOGGER.debug("Error on Nuki Bridge %s%s: %s", self.host, endpoint, err)
+                raise
+            finally:
+                self.metrics.record_request(
+                    "GET",
+                    endpoint,
+                    status,
+                    time.monotonic() - started,
+                    0,
+                    received,
+                    error,
+                )
+        self._retry_at = 0.0
+        return result
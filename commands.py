@@ -0,0 +1,110 @@
+"""Per-lock command queue for the Nuki Web API integration."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import NukiWebApiClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Command:
+    """An action waiting for or being sent to a smartlock."""
+
+    action: int
+    future: asyncio.Future[bool] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class NukiCommandQueue:
+    """Serialize actions per smartlock and drop the ones made obsolete.
+
+    Each smartlock has at most one action in flight and one waiting. A new
+    action replaces the waiting one, whose callers are told it was
+    superseded. An action equal to the one in flight or waiting joins it
+    instead of being sent again. Different smartlocks run in parallel.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: NukiWebApiClient) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self.client = client
+        self._running: dict[int, _Command] = {}
+        self._waiting: dict[int, _Command] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+
+    async def async_send(self, smartlock_id: int, action: int) -> bool:
+        """Queue an action code (see ACTION_* in const.py) for a smartlock.
+
+        Returns True once the action was accepted by the API and False if
+        a newer action superseded it before it was sent. API errors of the
+        request are raised to every caller waiting for it.
+        """
+        waiting = self._waiting.get(smartlock_id)
+        running = self._running.get(smartlock_id)
+        if waiting is not None and waiting.action == action:
+            command = waiting
+        elif running is not None and running.action == action:
+            # The action in flight already leads to the requested state
+            if waiting is not None:
+                self._async_supersede(smartlock_id, waiting)
+                del self._waiting[smartlock_id]
+            command = running
+        else:
+            if waiting is not None:
+                self._async_supersede(smartlock_id, waiting)
+            command = self._waiting[smartlock_id] = _Command(action)
+            if smartlock_id not in self._workers:
+                self._workers[smartlock_id] = self.hass.async_create_background_task(
+                    self._async_run(smartlock_id),
+                    f"nuki_webapi commands {smartlock_id}",
+                )
+
+        # Shielded so a cancelled caller does not cancel a shared command
+        return await asyncio.shield(command.future)
+
+    @callback
+    def _async_supersede(self, smartlock_id: int, command: _Command) -> None:
+        """Resolve a waiting command that will not be sent."""
+        _LOGGER.debug(
+            "Dropping action %s for Nuki lock %s, superseded by a newer one",
+            command.action,
+            smartlock_id,
+        )
+        command.future.set_result(False)
+
+    async def _async_run(self, smartlock_id: int) -> None:
+        """Send the waiting actions of a smartlock one after the other."""
+        try:
+            while (command := self._waiting.pop(smartlock_id, None)) is not None:
+                self._running[smartlock_id] = command
+                try:
+                    await self.client.action(smartlock_id, command.action)
+                except asyncio.CancelledError:
+                    command.future.cancel()
+                    raise
+                except Exception as err:  # pylint: disable=broad-except
+                    command.future.set_exception(err)
+                else:
+                    command.future.set_result(True)
+                finally:
+                    del self._running[smartlock_id]
+        finally:
+            self._workers.pop(smartlock_id, None)
+
+    async def async_cancel(self) -> None:
+        """Cancel all queued and running actions."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for command in self._waiting.values():
+            command.future.cancel()
+        self._waiting.clear()
+        self._workers.clear()
@@ -2,17 +2,42 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
 
 from .api import NukiWebApiClient
-from .const import DOMAIN
+from .bridge import NukiBridgeClient
+from .const import (
+    BRIDGE_DEFAULT_PORT,
+    CONF_ACTIVITY,
+    CONF_AUTH_SYNC,
+    CONF_BRIDGE_HOST,
+    CONF_BRIDGE_PORT,
+    CONF_BRIDGE_TOKEN,
+    CONF_CALL_BUDGET,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_PUSH,
+    CONF_SMARTLOCKS,
+    CONF_STALE_AFTER,
+    DATA_HANDOVER,
+    DEFAULT_ACTIVITY,
+    DEFAULT_AUTH_SYNC,
+    DEFAULT_CALL_BUDGET,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_PUSH,
+    DEFAULT_STALE_AFTER,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,21 +52,45 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+    The client, with its warm connection, and the smartlock list are handed
+    over to the setup of the config entry so it does not fetch them again.
     """
     client = NukiWebApiClient(data["api_token"])
     
     try:
         # Try to get smartlocks to validate the token
         smartlocks = await client.get_smartlocks()
-        
-        if not smartlocks:
-            raise NoSmartlocksFound
-        
-        return {"title": f"Nuki Web API ({len(smartlocks)} devices)"}
-    
     except Exception as err:
+        await client.async_close()
         _LOGGER.error("Error validating API token: %s", err)
         raise InvalidAuth from err
+    
+    if not smartlocks:
+        await client.async_close()
+        raise NoSmartlocksFound
+    
+    previous = hass.data.setdefault(DATA_HANDOVER, {}).pop(data["api_token"], None)
+    if previous is not None:
+        await previous["client"].async_close()
+    hass.data[DATA_HANDOVER][data["api_token"]] = {
+        "client": client,
+        "smartlocks": smartlocks,
+        "validated_at": time.monotonic(),
+    }
+    
+    return {"title": f"Nuki Web API ({len(smartlocks)} devices)"}
+
+
+async def validate_bridge(host: str, port: int, token: str) -> None:
+    """Validate a local bridge answers with the given token."""
+    bridge = NukiBridgeClient(host, token, port)
+    try:
+        await bridge.async_list()
+    except Exception as err:
+        _LOGGER.error("Error connecting to Nuki Bridge %s: %s", host, err)
+        raise CannotConnectBridge from err
+    finally:
+        await bridge.async_close()
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -49,6 +98,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -76,9 +133,110 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Nuki Web API options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the polling, push, activity, authorization and bridge options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if user_input[CONF_MIN_INTERVAL] > user_input[CONF_MAX_INTERVAL]:
+                errors["base"] = "invalid_interval_range"
+            elif user_input.get(CONF_BRIDGE_HOST):
+                try:
+                    await validate_bridge(
+                        user_input[CONF_BRIDGE_HOST],
+                        user_input[CONF_BRIDGE_PORT],
+                        user_input.get(CONF_BRIDGE_TOKEN, ""),
+                    )
+                except CannotConnectBridge:
+                    errors["base"] = "bridge_cannot_connect"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_INTERVAL,
+                    default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Required(
+                    CONF_MAX_INTERVAL,
+                    default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Required(
+                    CONF_CALL_BUDGET,
+                    default=options.get(CONF_CALL_BUDGET, DEFAULT_CALL_BUDGET),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=10000)),
+                # Zero makes the entities unavailable on the first failed poll
+                vol.Required(
+                    CONF_STALE_AFTER,
+                    default=options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_PUSH,
+                    default=options.get(CONF_PUSH, DEFAULT_PUSH),
+                ): bool,
+                vol.Required(
+                    CONF_ACTIVITY,
+                    default=options.get(CONF_ACTIVITY, DEFAULT_ACTIVITY),
+                ): bool,
+                vol.Required(
+                    CONF_AUTH_SYNC,
+                    default=options.get(CONF_AUTH_SYNC, DEFAULT_AUTH_SYNC),
+                ): bool,
+                # Smartlocks of the account this entry exposes, none for all
+                vol.Optional(
+                    CONF_SMARTLOCKS,
+                    default=options.get(CONF_SMARTLOCKS, []),
+                ): cv.multi_select(self._smartlock_names()),
+                # Local bridge, tried first for actions and state reads
+                vol.Optional(
+                    CONF_BRIDGE_HOST,
+                    description={"suggested_value": options.get(CONF_BRIDGE_HOST)},
+                ): str,
+                vol.Required(
+                    CONF_BRIDGE_PORT,
+                    default=options.get(CONF_BRIDGE_PORT, BRIDGE_DEFAULT_PORT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+                vol.Optional(
+                    CONF_BRIDGE_TOKEN,
+                    description={"suggested_value": options.get(CONF_BRIDGE_TOKEN)},
+                ): str,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    def _smartlock_names(self) -> dict[str, str]:
+        """Return the names of the account's smartlocks by id."""
+        data = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        smartlocks = (data["coordinator"].data or {}) if data else {}
+        names = {
+            str(smartlock_id): smartlock.name
+            for smartlock_id, smartlock in smartlocks.items()
+        }
+        # Keep selected smartlocks that are not known (anymore) selectable
+        for smartlock_id in self._entry.options.get(CONF_SMARTLOCKS, []):
+            names.setdefault(smartlock_id, smartlock_id)
+        return names
+
+
 class NoSmartlocksFound(HomeAssistantError):
     """Error to indicate no smartlocks were found."""
 
 
 class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
+
+
+class CannotConnectBridge(HomeAssistantError):
+    """Error to indicate the local bridge could not be reached."""
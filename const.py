@@ -6,6 +6,181 @@ DOMAIN = "nuki_webapi"
 API_BASE_URL = "https://api.nuki.io"
 API_TIMEOUT = 10
 
+# Polling
+POLL_BACKOFF_FACTOR = 1.5
+# Seconds after an action during which polling stays fast
+ACTION_FAST_POLL_WINDOW = 60
+
+# Seconds the last good data keeps being served while polls fail, before
+# the entities become unavailable
+DEFAULT_STALE_AFTER = 600
+# Failed polls are retried after the minimum interval, multiplied by this
+# factor per further failure up to the maximum interval
+REVALIDATE_BACKOFF_FACTOR = 2
+
+# Recorded traffic
+RECORDING_FORMAT = "nuki_webapi-recording/1"
+# Recorded exchanges written to the file at once
+RECORDING_FLUSH_SIZE = 100
+
+# On-demand profiling of poll cycles
+PROFILE_DEFAULT_CYCLES = 3
+PROFILE_MAX_CYCLES = 20
+# Functions and allocation sites listed per section of a profile report
+PROFILE_TOP = 25
+# Phases of a poll cycle, in the order they are reported
+PHASE_CYCLE = "cycle"  # whole coordinator refresh
+PHASE_FETCH = "fetch"  # get_smartlocks(), including rate limiting and retries
+PHASE_HTTP = "http"  # transport round trips
+PHASE_DECODE = "decode"  # JSON decoding of responses
+PHASE_PARSE = "parse"  # NukiSmartlock models and diff against the last poll
+PHASE_NOTIFY = "notify"  # entity fan-out, including state writes
+PHASES = (
+    PHASE_CYCLE,
+    PHASE_FETCH,
+    PHASE_HTTP,
+    PHASE_DECODE,
+    PHASE_PARSE,
+    PHASE_NOTIFY,
+)
+
+# Instrumentation
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Recent latency samples kept per histogram for percentiles
+METRICS_SAMPLE_SIZE = 500
+
+# Persisted smartlock snapshot
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+
+# Clients and smartlocks validated by the config flow, keyed by API token,
+# waiting to be picked up by the setup of the new config entry
+DATA_HANDOVER = f"{DOMAIN}_handover"
+# Accounts shared by config entries, keyed by API token
+DATA_ACCOUNTS = f"{DOMAIN}_accounts"
+DATA_ACCOUNT_LOCKS = f"{DOMAIN}_account_locks"
+# Set while a profiling run is active
+DATA_PROFILING = f"{DOMAIN}_profiling"
+# Seconds a handed over smartlock list is used without a refresh
+HANDOVER_MAX_AGE = 60
+
+# Webhook push
+WEBHOOK_FEATURES = ["DEVICE_STATUS", "DEVICE_MASTERDATA"]
+WEBHOOK_SIGNATURE_HEADER = "X-Nuki-Signature-SHA256"
+# Seconds between reconciliation polls while push updates are active
+PUSH_RECONCILE_INTERVAL = 900
+
+# Local Nuki Bridge HTTP API
+BRIDGE_DEFAULT_PORT = 8080
+# Short, so an unreachable bridge delays the Web API fallback only briefly
+BRIDGE_TIMEOUT = 3
+# Seconds a bridge is skipped after a failed request
+BRIDGE_RETRY_INTERVAL = 60
+# Names of the paths serving a request, recorded in the metrics
+PATH_BRIDGE = "bridge"
+PATH_WEB_API = "web_api"
+
+# Activity log
+EVENT_ACTIVITY = f"{DOMAIN}_activity"
+# Log entries requested per page and pages fetched per ingestion at most
+ACTIVITY_PAGE_SIZE = 50
+ACTIVITY_MAX_PAGES = 4
+# Recent log entries kept per smartlock
+ACTIVITY_BUFFER_SIZE = 20
+# Seconds to wait after a state change so the log entry exists and
+# changes of several locks are fetched together
+ACTIVITY_FETCH_COOLDOWN = 10
+
+# Authorization sync
+# Seconds between full authorization syncs
+AUTH_SYNC_INTERVAL = 3600
+# Seconds a synced authorization list is trusted by the services
+AUTH_CACHE_TTL = 300
+AUTH_PAGE_SIZE = 100
+AUTH_MAX_PAGES = 20
+# Authorization ids revoked per DELETE request
+AUTH_DELETE_BATCH_SIZE = 50
+
+# Authorization types
+AUTH_TYPE_APP = 0
+AUTH_TYPE_BRIDGE = 1
+AUTH_TYPE_FOB = 2
+AUTH_TYPE_KEYPAD = 3
+AUTH_TYPE_KEYPAD_CODE = 13
+AUTH_TYPE_Z_KEY = 14
+AUTH_TYPE_VIRTUAL = 15
+
+# Summary keys of the authorization types
+AUTH_TYPE_NAMES = {
+    AUTH_TYPE_APP: "app",
+    AUTH_TYPE_BRIDGE: "bridge",
+    AUTH_TYPE_FOB: "fob",
+    AUTH_TYPE_KEYPAD: "keypad",
+    AUTH_TYPE_KEYPAD_CODE: "keypad_code",
+    AUTH_TYPE_Z_KEY: "z_key",
+    AUTH_TYPE_VIRTUAL: "virtual",
+}
+
+# Options
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+CONF_CALL_BUDGET = "call_budget"
+CONF_PUSH = "push"
+CONF_ACTIVITY = "activity"
+CONF_AUTH_SYNC = "auth_sync"
+CONF_SMARTLOCKS = "smartlocks"
+CONF_STALE_AFTER = "stale_after"
+CONF_BRIDGE_HOST = "bridge_host"
+CONF_BRIDGE_PORT = "bridge_port"
+CONF_BRIDGE_TOKEN = "bridge_token"
+
+DEFAULT_MIN_INTERVAL = 10
+DEFAULT_MAX_INTERVAL = 300
+DEFAULT_CALL_BUDGET = 600
+DEFAULT_PUSH = False
+DEFAULT_ACTIVITY = True
+DEFAULT_AUTH_SYNC = False
+
+# Fields of a /smartlock entry kept when decoding the response
+SMARTLOCK_FIELDS = ("smartlockId", "name", "type", "state")
+
+# Smartlock metadata, synced on a slow cadence of its own
+METADATA_FIELDS = (
+    "smartlockId",
+    "name",
+    "type",
+    "firmwareVersion",
+    "hardwareVersion",
+    "serverState",
+    "adminPinState",
+)
+# Seconds between metadata syncs
+METADATA_INTERVAL = 3600
+
+# Device models by smartlock type
+DEVICE_MODELS = {
+    0: "Smart Lock 1.0/2.0",
+    2: "Opener",
+    3: "Smart Door",
+    4: "Smart Lock 3.0",
+    5: "Smart Lock 4.0",
+}
+DEFAULT_DEVICE_MODEL = "Smart Lock"
+
+# Rate limiting and retries
+API_RATE_LIMIT_PER_MINUTE = 60
+API_RATE_LIMIT_BURST = 10
+API_MAX_RETRIES = 3
+API_RETRY_BASE_DELAY = 1
+API_RETRY_MAX_DELAY = 30
+API_CIRCUIT_FAILURE_THRESHOLD = 5
+API_CIRCUIT_RESET_TIMEOUT = 60
+
+# HTTP connection pool
+API_CONNECTION_LIMIT = 10
+API_DNS_CACHE_TTL = 300
+API_KEEPALIVE_TIMEOUT = 60
+
 # Smart Lock Actions
 ACTION_UNLOCK = 1
 ACTION_LOCK = 2
@@ -13,6 +188,9 @@ ACTION_UNLATCH = 3
 ACTION_LOCK_N_GO = 4
 ACTION_LOCK_N_GO_UNLATCH = 5
 
+# Default number of locks a bulk action talks to at the same time
+DEFAULT_BULK_CONCURRENCY = 4
+
 # Smart Lock States
 STATE_UNCALIBRATED = 0
 STATE_LOCKED = 1
@@ -25,6 +203,28 @@ STATE_UNLATCHING = 7
 STATE_MOTOR_BLOCKED = 254
 STATE_UNDEFINED = 255
 
+# States in which the lock is still moving
+TRANSITIONAL_STATES = {STATE_UNLOCKING, STATE_LOCKING, STATE_UNLATCHING}
+
+# Terminal states that complete each action
+ACTION_TARGET_STATES = {
+    ACTION_UNLOCK: frozenset({STATE_UNLOCKED}),
+    ACTION_LOCK: frozenset({STATE_LOCKED}),
+    ACTION_UNLATCH: frozenset({STATE_UNLATCHED, STATE_UNLOCKED}),
+    ACTION_LOCK_N_GO: frozenset({STATE_UNLOCKED_LOCK_N_GO}),
+    ACTION_LOCK_N_GO_UNLATCH: frozenset({STATE_UNLOCKED_LOCK_N_GO, STATE_UNLATCHED}),
+}
+
+# Seconds between single-lock polls while waiting for an action to complete
+ACTION_TRACK_DELAYS = (1, 1, 1, 2, 2, 3)
+ACTION_TRACK_TIMEOUT = 30
+
+# Seconds single-lock refreshes are collected before they are fetched
+REFRESH_COALESCE_WINDOW = 0.25
+# Collected smartlocks from which one /smartlock download is used instead
+# of one /smartlock/{id} request per lock
+REFRESH_BATCH_MIN = 3
+
 # Mapping of Nuki states to Home Assistant states
 NUKI_STATES_MAP = {
     STATE_UNCALIBRATED: "locked",
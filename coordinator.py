@@ -0,0 +1,333 @@
+"""Data update coordinator for the Nuki Web API integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import NukiWebApiClient
+from .const import (
+    DEFAULT_STALE_AFTER,
+    PHASE_FETCH,
+    PHASE_NOTIFY,
+    PHASE_PARSE,
+    REFRESH_BATCH_MIN,
+    REFRESH_COALESCE_WINDOW,
+    SNAPSHOT_SAVE_DELAY,
+    TRANSITIONAL_STATES,
+)
+from .models import NukiSmartlock
+from .profiler import profile_phase
+from .scheduler import AdaptivePollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NukiDataUpdateCoordinator(DataUpdateCoordinator[dict[int, NukiSmartlock]]):
+    """Coordinator holding the smartlocks of one Nuki account.
+
+    The API response is parsed once per poll into NukiSmartlock models keyed
+    by smartlockId. After each poll the new snapshot is
+    diffed against the previous one so only the entities of smartlocks that
+    actually changed are notified. The poll interval is recomputed after
+    each poll by the adaptive scheduler. The last good snapshot is persisted
+    so entities can be created from it on the next start.
+
+    When a poll fails, the last good data keeps being served and entities
+    are not notified; they only become unavailable once the data is older
+    than `stale_after` seconds. Failed polls are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: NukiWebApiClient,
+        scheduler: AdaptivePollScheduler,
+        store: Store,
+        stale_after: float = DEFAULT_STALE_AFTER,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Nuki Web API",
+            update_interval=timedelta(seconds=scheduler.min_interval),
+            always_update=False,
+        )
+        self.client = client
+        self.scheduler = scheduler
+        self._store = store
+        self.stale_after = stale_after
+        # Smartlocks changed by the last poll, None means "notify everyone"
+        self._changed_ids: set[int] | None = None
+        # Availability last pushed to all listeners
+        self._notified_available = True
+        self._unsub_stale: CALLBACK_TYPE | None = None
+        # Single-lock refreshes collected for the next batch
+        self._refresh_ids: set[int] = set()
+        self._refresh_batch: asyncio.Task | None = None
+
+    async def _async_update_data(self) -> dict[int, NukiSmartlock]:
+        """Fetch data from API endpoint."""
+        metrics = self.client.metrics
+        started = metrics.poll_started()
+        try:
+            with profile_phase(self.client.profiler, PHASE_FETCH, profile=False):
+                smartlocks = await self.client.get_smartlocks()
+        except Exception as err:
+            metrics.poll_finished(started, success=False)
+            # Revalidate in the background with backoff, serving the last
+            # good data meanwhile
+            self.update_interval = self.scheduler.retry_interval()
+            _LOGGER.debug("Poll failed, retrying in %s", self.update_interval)
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        with profile_phase(self.client.profiler, PHASE_PARSE):
+            data = self._parse(smartlocks)
+
+        self.update_interval = self.scheduler.next_interval(
+            transitional=any(
+                smartlock.state in TRANSITIONAL_STATES
+                for smartlock in data.values()
+            ),
+            changed=self._changed_ids is None or bool(self._changed_ids),
+            calls_last_hour=self.client.calls_last_hour(),
+        )
+        _LOGGER.debug("Next poll in %s", self.update_interval)
+        metrics.record_good_data()
+        self._async_save_snapshot()
+        metrics.poll_finished(started, success=True)
+        return data
+
+    def _parse(self, smartlocks: list[dict[str, Any]]) -> dict[int, NukiSmartlock]:
+        """Parse a /smartlock response and diff it against the current data."""
+        data = {
+            smartlock.smartlock_id: smartlock
+            for smartlock in map(NukiSmartlock.from_api, smartlocks)
+        }
+        previous = self.data
+        if previous is None or previous.keys() != data.keys():
+            self._changed_ids = None
+        else:
+            self._changed_ids = {
+                smartlock_id
+                for smartlock_id, smartlock in data.items()
+                if previous[smartlock_id] != smartlock
+            }
+        return data
+
+    @property
+    def data_age(self) -> float | None:
+        """Return the seconds since the data was last fetched successfully."""
+        return self.client.metrics.data_age
+
+    @property
+    def available(self) -> bool:
+        """Return True while the data is recent enough to be shown.
+
+        The data stays available after failed polls until it is older than
+        `stale_after` seconds.
+        """
+        if self.data is None:
+            return False
+        if self.last_update_success:
+            return True
+        age = self.data_age
+        return age is not None and age <= self.stale_after
+
+    @callback
+    def async_patch_smartlock(self, smartlock_id: int, changes: dict[str, Any]) -> None:
+        """Merge pushed API-shaped fields into a smartlock.
+
+        Push payloads may only carry the changed fields, so they are merged
+        into the current model instead of replacing it.
+        """
+        if self.data is None or (current := self.data.get(smartlock_id)) is None:
+            return
+        self._async_set_smartlock(current.with_changes(changes))
+
+    async def async_load_snapshot(self) -> bool:
+        """Use the last persisted snapshot as coordinator data.
+
+        Returns False if there is no snapshot to start from.
+        """
+        stored = await self._store.async_load()
+        if not stored or not stored.get("smartlocks"):
+            return False
+        self.data = {
+            smartlock.smartlock_id: smartlock
+            for smartlock in map(NukiSmartlock.from_api, stored["smartlocks"])
+        }
+        # Snapshots without a fetch time are stale if the first poll fails
+        if (fetched_at := stored.get("fetched_at")) is not None:
+            self.client.metrics.record_good_data(fetched_at)
+        _LOGGER.debug("Loaded snapshot with %s smartlocks", len(self.data))
+        return True
+
+    @callback
+    def async_set_smartlocks(self, smartlocks: list[dict[str, Any]]) -> None:
+        """Use an already fetched /smartlock response as coordinator data."""
+        self.async_set_updated_data(
+            {
+                smartlock.smartlock_id: smartlock
+                for smartlock in map(NukiSmartlock.from_api, smartlocks)
+            }
+        )
+        self.client.metrics.record_good_data()
+        self._async_save_snapshot()
+
+    @callback
+    def _async_save_snapshot(self) -> None:
+        """Persist the current data, batching writes."""
+        self._store.async_delay_save(
+            lambda: {
+                "smartlocks": [
+                    smartlock.as_api() for smartlock in (self.data or {}).values()
+                ],
+                "fetched_at": self.client.metrics.last_good_data,
+            },
+            SNAPSHOT_SAVE_DELAY,
+        )
+
+    @callback
+    def async_note_action(self) -> None:
+        """Switch to fast polling after an action was sent to a lock."""
+        self.scheduler.note_action()
+        if self.scheduler.push_active:
+            # The final state arrives through the webhook
+            return
+        interval = timedelta(seconds=self.scheduler.min_interval)
+        if self.update_interval is None or self.update_interval > interval:
+            self.update_interval = interval
+            self._schedule_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify listeners, restricted to changed smartlocks when possible.
+
+        A failed poll notifies nobody unless it makes the data unavailable.
+        """
+        with profile_phase(self.client.profiler, PHASE_NOTIFY):
+            self._async_notify_listeners()
+
+    @callback
+    def _async_notify_listeners(self) -> None:
+        """Notify the listeners affected by the last poll."""
+        changed, self._changed_ids = self._changed_ids, None
+        available = self.available
+        if available != self._notified_available:
+            self._notified_available = available
+            super().async_update_listeners()
+            return
+        if not self.last_update_success:
+            self._async_schedule_stale_check()
+            return
+        if changed is None:
+            super().async_update_listeners()
+            return
+        self.async_update_smartlock_listeners(changed)
+
+    @callback
+    def _async_schedule_stale_check(self) -> None:
+        """Check availability again once the data passes the threshold."""
+        if self._unsub_stale is not None or (age := self.data_age) is None:
+            return
+        self._unsub_stale = async_call_later(
+            self.hass, max(0.0, self.stale_after - age) + 1, self._async_check_stale
+        )
+
+    @callback
+    def _async_check_stale(self, _now: Any) -> None:
+        """Mark the data unavailable if polls kept failing."""
+        self._unsub_stale = None
+        if not self.last_update_success:
+            self.async_update_listeners()
+
+    async def async_refresh_smartlock(self, smartlock_id: int) -> None:
+        """Fetch a single smartlock and patch it into the coordinator data.
+
+        Requests for different smartlocks arriving within
+        REFRESH_COALESCE_WINDOW are fetched together, with one /smartlock
+        download once REFRESH_BATCH_MIN locks are collected. Only the
+        entities of the refreshed smartlocks are notified. Errors are logged
+        and swallowed; the next scheduled poll will catch up.
+        """
+        self._refresh_ids.add(smartlock_id)
+        if self._refresh_batch is None:
+            self._refresh_batch = self.hass.async_create_background_task(
+                self._async_refresh_batch(), f"{self.name} refresh smartlocks"
+            )
+        await asyncio.shield(self._refresh_batch)
+
+    async def async_cancel_refreshes(self) -> None:
+        """Cancel a pending batch of single-lock refreshes and stale check."""
+        if self._unsub_stale is not None:
+            self._unsub_stale()
+            self._unsub_stale = None
+        if (batch := self._refresh_batch) is not None:
+            batch.cancel()
+            await asyncio.gather(batch, return_exceptions=True)
+        self._refresh_ids.clear()
+        self._refresh_batch = None
+
+    async def _async_refresh_batch(self) -> None:
+        """Fetch the smartlocks collected during the coalescing window."""
+        await asyncio.sleep(REFRESH_COALESCE_WINDOW)
+        # Later requests start a new batch and get data fetched after them
+        smartlock_ids, self._refresh_ids = self._refresh_ids, set()
+        self._refresh_batch = None
+
+        if len(smartlock_ids) >= REFRESH_BATCH_MIN:
+            try:
+                results = await self.client.get_smartlocks()
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Error refreshing smartlocks: %s", err)
+                return
+            results = [
+                smartlock
+                for smartlock in results
+                if smartlock.get("smartlockId") in smartlock_ids
+            ]
+        else:
+            results = await asyncio.gather(
+                *map(self.client.get_smartlock, smartlock_ids),
+                return_exceptions=True,
+            )
+
+        for smartlock in results:
+            if isinstance(smartlock, Exception):
+                _LOGGER.debug("Error refreshing smartlock: %s", smartlock)
+            elif smartlock:
+                # Merged, as a bridge only reports the state of a smartlock
+                self.async_patch_smartlock(smartlock["smartlockId"], smartlock)
+
+    @callback
+    def _async_set_smartlock(self, smartlock: NukiSmartlock) -> None:
+        """Replace a known smartlock and notify its entities if it changed."""
+        if self.data is None:
+            return
+        current = self.data.get(smartlock.smartlock_id)
+        if current is None:
+            # Unknown smartlock, let the next full poll pick it up
+            return
+        if current == smartlock:
+            return
+
+        self.data[smartlock.smartlock_id] = smartlock
+        self._async_save_snapshot()
+        self.async_update_smartlock_listeners([smartlock.smartlock_id])
+
+    @callback
+    def async_update_smartlock_listeners(self, smartlock_ids: Iterable[int]) -> None:
+        """Notify only the listeners registered for the given smartlocks."""
+        wanted = set(smartlock_ids)
+        for update_callback, context in list(self._listeners.values()):
+            if context in wanted:
+                update_callback()
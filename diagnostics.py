@@ -0,0 +1,82 @@
+"""Diagnostics support for the Nuki Web API integration."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_BRIDGE_TOKEN, DOMAIN
+
+TO_REDACT = {"api_token", CONF_BRIDGE_TOKEN}
+# Activity log entries name the person behind an authorization
+ACTIVITY_TO_REDACT = {"name"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    client = data["client"]
+    coordinator = data["coordinator"]
+    activity = data["activity"]
+    auth = data["auth"]
+    smartlock_ids = data["smartlock_ids"]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "account": {
+            "entries": len(data["account"].entries),
+            "smartlock_filter": (
+                sorted(smartlock_ids) if smartlock_ids is not None else None
+            ),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "push_active": coordinator.scheduler.push_active,
+            "available": coordinator.available,
+            "data_age": coordinator.data_age,
+            "stale_after": coordinator.stale_after,
+            "smartlocks": len(coordinator.data or {}),
+        },
+        "authorizations": (
+            {
+                "last_update_success": auth.last_update_success,
+                "fresh": auth.is_fresh,
+                "summary": auth.summary(),
+            }
+            if auth is not None
+            else None
+        ),
+        "bridge": bridge.as_dict() if (bridge := data["bridge"]) is not None else None,
+        "rate_limit": client.rate_limit_state,
+        "metrics": client.metrics.as_dict(),
+        "smartlocks": [
+            asdict(smartlock) for smartlock in (coordinator.data or {}).values()
+        ],
+        "metadata": [
+            asdict(info) for info in (data["metadata"].data or {}).values()
+        ],
+        "activity": (
+            {
+                smartlock_id: async_redact_data(
+                    activity.recent(smartlock_id), ACTIVITY_TO_REDACT
+                )
+                for smartlock_id in coordinator.data or {}
+                if smartlock_ids is None or smartlock_id in smartlock_ids
+            }
+            if activity is not None
+            else None
+        ),
+    }
@@ -0,0 +1,97 @@
+"""JSON encoding and decoding for the Nuki Web API client.
+
+Uses orjson when it is installed (it ships with Home Assistant) and falls
+back to the standard library otherwise.
+"""
+from __future__ import annotations
+
+from collections.abc import Collection
+import json
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_DECODER = "orjson" if orjson is not None else "json"
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def json_dumps(data: Any) -> bytes:
+    """Encode a request body."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Decode a response body."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_loads_projected(
+    data: bytes | str, key: str, fields: Collection[str]
+) -> Any:
+    """Decode a response body, keeping only `fields` of each record.
+
+    Records are the top-level object, or the objects of a top-level list,
+    that contain `key`, e.g. "smartlockId" for the entries of /smartlock.
+    Nested objects are left untouched, also when they contain `key`.
+
+    With orjson the body is decoded in one pass and then projected, as
+    orjson has no streaming interface. With the standard library a
+    top-level list is decoded one item at a time and each record is
+    projected before the next one is decoded, so the dropped fields (e.g.
+    the large `config` blocks) of only one record are held at a time. The
+    dropped fields are still parsed: skipping them in Python is several
+    times slower than letting the C decoder build and discard them.
+    """
+    if orjson is not None:
+        return _project(orjson.loads(data), key, fields)
+    text = data.decode() if isinstance(data, bytes) else data
+    idx = _WHITESPACE.match(text, 0).end()
+    if not text.startswith("[", idx):
+        return _project_record(json.loads(text), key, fields)
+
+    records = []
+    idx = _WHITESPACE.match(text, idx + 1).end()
+    if text.startswith("]", idx):
+        _expect_end(text, idx + 1)
+        return records
+    while True:
+        value, idx = _DECODER.raw_decode(text, idx)
+        records.append(_project_record(value, key, fields))
+        idx = _WHITESPACE.match(text, idx).end()
+        if text.startswith(",", idx):
+            idx = _WHITESPACE.match(text, idx + 1).end()
+            continue
+        if text.startswith("]", idx):
+            _expect_end(text, idx + 1)
+            return records
+        raise ValueError(f"Expecting ',' or ']' at position {idx}")
+
+
+def _expect_end(text: str, idx: int) -> None:
+    """Raise ValueError if anything but whitespace follows `idx`."""
+    if _WHITESPACE.match(text, idx).end() != len(text):
+        raise ValueError(f"Extra data at position {idx}")
+
+
+def _project(value: Any, key: str, fields: Collection[str]) -> Any:
+    """Project the records of a decoded top-level list or record."""
+    if isinstance(value, list):
+        return [_project_record(item, key, fields) for item in value]
+    return _project_record(value, key, fields)
+
+
+def _project_record(value: Any, key: str, fields: Collection[str]) -> Any:
+    """Keep only `fields` of a record, return anything else unchanged."""
+    if isinstance(value, dict) and key in value:
+        return {name: value[name] for name in fields if name in value}
+    return value
@@ -1,7 +1,6 @@
 """Platform for Nuki Web API lock integration."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any
 
@@ -9,15 +8,36 @@ import voluptuous as vol
 
 from homeassistant.components.lock import LockEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, NUKI_STATES_MAP
+from .account import entry_smartlocks
+from .const import (
+    ACTION_LOCK,
+    ACTION_LOCK_N_GO,
+    ACTION_LOCK_N_GO_UNLATCH,
+    ACTION_TARGET_STATES,
+    ACTION_UNLATCH,
+    ACTION_UNLOCK,
+    DOMAIN,
+    STATE_MOTOR_BLOCKED,
+    TRANSITIONAL_STATES,
+)
+from .models import LockState, NukiSmartlock, device_model
 
 _LOGGER = logging.getLogger(__name__)
 
+# State shown between a successful action request and the lock reporting it
+OPTIMISTIC_STATES = {
+    ACTION_UNLOCK: LockState.UNLOCKING,
+    ACTION_LOCK: LockState.LOCKING,
+    ACTION_UNLATCH: LockState.UNLOCKING,
+    ACTION_LOCK_N_GO: LockState.UNLOCKING,
+    ACTION_LOCK_N_GO_UNLATCH: LockState.UNLOCKING,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -27,12 +47,13 @@ async def async_setup_entry(
     """Set up Nuki locks from a config entry."""
     data = hass.data[DOMAIN][config_entry.entry_id]
     coordinator = data["coordinator"]
-    client = data["client"]
+    commands = data["commands"]
+    tracker = data["tracker"]
 
     # Create entities for each smartlock found
     entities = []
-    for smartlock in coordinator.data:
-        entities.append(NukiLock(coordinator, client, smartlock))
+    for smartlock in entry_smartlocks(data):
+        entities.append(NukiLock(coordinator, commands, tracker, smartlock))
 
     async_add_entities(entities)
 
@@ -50,12 +71,15 @@ async def async_setup_entry(
 class NukiLock(CoordinatorEntity, LockEntity):
     """Representation of a Nuki Smart Lock."""
 
-    def __init__(self, coordinator, client, smartlock_data: dict[str, Any]) -> None:
+    def __init__(
+        self, coordinator, commands, tracker, smartlock: NukiSmartlock
+    ) -> None:
         """Initialize the lock."""
-        super().__init__(coordinator)
-        self._client = client
-        self._smartlock_id = smartlock_data["smartlockId"]
-        self._attr_name = smartlock_data.get("name", f"Nuki Lock {self._smartlock_id}")
+        super().__init__(coordinator, context=smartlock.smartlock_id)
+        self._commands = commands
+        self._tracker = tracker
+        self._smartlock_id = smartlock.smartlock_id
+        self._attr_name = smartlock.name
         self._attr_unique_id = f"nuki_{self._smartlock_id}"
         
         # Device information
@@ -63,110 +87,130 @@ class NukiLock(CoordinatorEntity, LockEntity):
             "identifiers": {(DOMAIN, self._smartlock_id)},
             "name": self._attr_name,
             "manufacturer": "Nuki",
-            "model": "Smart Lock",
+            "model": device_model(smartlock.device_type),
         }
         
+        # Expected state of a sent action until the server confirms it
+        self._optimistic: LockState | None = None
+        self._optimistic_targets: frozenset[int] = frozenset()
+        
         # Update initial state
-        self._update_from_data(smartlock_data)
+        self._update_from_data(smartlock)
 
-    def _update_from_data(self, smartlock_data: dict[str, Any]) -> None:
+    def _update_from_data(self, smartlock: NukiSmartlock) -> None:
         """Update the lock state from smartlock data."""
-        state = smartlock_data.get("state", {})
-        self._state = state.get("state", 255)  # 255 = undefined
-        self._battery_critical = state.get("batteryCritical", False)
-        
+        self._smartlock = smartlock
+        # The server took over once the lock moves, arrives or jams
+        if self._optimistic is not None and (
+            smartlock.state in self._optimistic_targets
+            or smartlock.state in TRANSITIONAL_STATES
+            or smartlock.state == STATE_MOTOR_BLOCKED
+        ):
+            self._optimistic = None
+
+    @property
+    def _lock_state(self) -> LockState:
+        """Return the optimistic state, or the state reported by the API."""
+        return self._optimistic or self._smartlock.lock_state
+
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
-        return self.coordinator.last_update_success
+        """Return True while the last good data is recent enough."""
+        return self.coordinator.available
 
     @property
     def is_locked(self) -> bool | None:
         """Return true if the lock is locked."""
-        state_str = NUKI_STATES_MAP.get(self._state, "unknown")
-        if state_str == "locked":
+        lock_state = self._lock_state
+        if lock_state is LockState.LOCKED:
             return True
-        elif state_str in ["unlocked", "unlatched"]:
+        elif lock_state is LockState.UNLOCKED:
             return False
         return None
 
     @property
     def is_locking(self) -> bool:
         """Return true if the lock is locking."""
-        return NUKI_STATES_MAP.get(self._state) == "locking"
+        return self._lock_state is LockState.LOCKING
 
     @property
     def is_unlocking(self) -> bool:
         """Return true if the lock is unlocking."""
-        return NUKI_STATES_MAP.get(self._state) == "unlocking"
+        return self._lock_state is LockState.UNLOCKING
 
     @property
     def is_jammed(self) -> bool:
         """Return true if the lock is jammed."""
-        return NUKI_STATES_MAP.get(self._state) == "jammed"
+        return self._lock_state is LockState.JAMMED
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         return {
-            "battery_critical": self._battery_critical,
-            "nuki_state": self._state,
-            "nuki_state_name": NUKI_STATES_MAP.get(self._state, "unknown"),
+            "battery_critical": self._smartlock.battery_critical,
+            "nuki_state": self._smartlock.state,
+            "nuki_state_name": self._smartlock.lock_state.value,
         }
 
     async def async_lock(self, **kwargs: Any) -> None:
         """Lock the device."""
         _LOGGER.debug("Locking Nuki lock %s", self._smartlock_id)
-        await self._client.lock(self._smartlock_id)
-        # Immediate refresh
-        await self.coordinator.async_request_refresh()
-        # Schedule a delayed refresh in the background (non-blocking)
-        # Nuki lock takes 1-3 seconds to complete the action
-        self._schedule_delayed_refresh()
+        await self._async_send(ACTION_LOCK)
 
     async def async_unlock(self, **kwargs: Any) -> None:
         """Unlock the device."""
         _LOGGER.debug("Unlocking Nuki lock %s", self._smartlock_id)
-        await self._client.unlock(self._smartlock_id)
-        # Immediate refresh
-        await self.coordinator.async_request_refresh()
-        # Schedule a delayed refresh in the background
-        self._schedule_delayed_refresh()
+        await self._async_send(ACTION_UNLOCK)
 
     async def async_open(self, **kwargs: Any) -> None:
         """Open the door latch."""
         _LOGGER.debug("Unlatching Nuki lock %s", self._smartlock_id)
-        await self._client.unlatch(self._smartlock_id)
-        # Immediate refresh
-        await self.coordinator.async_request_refresh()
-        # Schedule a delayed refresh in the background
-        self._schedule_delayed_refresh()
+        await self._async_send(ACTION_UNLATCH)
 
     async def async_lock_n_go(self, unlatch: bool = False) -> None:
         """Execute lock'n'go action."""
         _LOGGER.debug("Lock'n'go on Nuki lock %s (unlatch=%s)", self._smartlock_id, unlatch)
-        await self._client.lock_n_go(self._smartlock_id, unlatch)
-        # Immediate refresh
-        await self.coordinator.async_request_refresh()
-        # Schedule a delayed refresh in the background
-        self._schedule_delayed_refresh()
-
-    def _schedule_delayed_refresh(self) -> None:
-        """Schedule a delayed refresh to catch the final lock state."""
-        async def delayed_refresh():
-            """Wait and then refresh."""
-            await asyncio.sleep(3)
-            await self.coordinator.async_request_refresh()
-
-        # Create task in the background (non-blocking)
-        asyncio.create_task(delayed_refresh())
+        await self._async_send(
+            ACTION_LOCK_N_GO_UNLATCH if unlatch else ACTION_LOCK_N_GO
+        )
+
+    async def _async_send(self, action: int) -> None:
+        """Queue an action, then show the expected state until confirmed.
+
+        Actions superseded by a newer one on the same lock are not sent.
+        """
+        if not await self._commands.async_send(self._smartlock_id, action):
+            return
+        # Nuki lock takes 1-3 seconds to complete the action
+        targets = ACTION_TARGET_STATES[action]
+        if self._smartlock.state not in targets:
+            self._optimistic = OPTIMISTIC_STATES[action]
+            self._optimistic_targets = targets
+            self.async_write_ha_state()
+        self._tracker.async_track(
+            self._smartlock_id, action, self._async_action_finished
+        )
+
+    @callback
+    def _async_action_finished(self, settled: bool) -> None:
+        """Drop the optimistic state once tracking of the action ended."""
+        if self._optimistic is None:
+            return
+        if not settled:
+            # The tracker already logged the state the lock reports
+            _LOGGER.debug(
+                "Rolling back Nuki lock %s from %s to %s",
+                self._smartlock_id,
+                self._optimistic,
+                self._smartlock.lock_state,
+            )
+        self._optimistic = None
+        self.async_write_ha_state()
 
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        # Find the updated data for this specific smartlock
-        for smartlock in self.coordinator.data:
-            if smartlock["smartlockId"] == self._smartlock_id:
-                self._update_from_data(smartlock)
-                break
+        # Coordinator data is keyed by smartlockId
+        if (smartlock := self.coordinator.data.get(self._smartlock_id)) is not None:
+            self._update_from_data(smartlock)
         
         self.async_write_ha_state()
@@ -0,0 +1,71 @@
+"""Smartlock metadata sync for the Nuki Web API integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import NukiWebApiClient
+from .const import DOMAIN, METADATA_FIELDS, METADATA_INTERVAL
+from .models import NukiSmartlockInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NukiMetadataCoordinator(DataUpdateCoordinator[dict[int, NukiSmartlockInfo]]):
+    """Coordinator holding names, models and firmware of the smartlocks.
+
+    This data changes rarely, so it is synced hourly, or on demand when a
+    webhook reports changed master data, instead of on every state poll.
+    Changes are written to the device registry; the state entities do not
+    listen to this coordinator.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: NukiWebApiClient) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Nuki Web API metadata",
+            update_interval=timedelta(seconds=METADATA_INTERVAL),
+            always_update=False,
+        )
+        self.client = client
+
+    async def _async_update_data(self) -> dict[int, NukiSmartlockInfo]:
+        """Fetch the metadata fields of all smartlocks."""
+        try:
+            smartlocks = await self.client.get_smartlocks(fields=METADATA_FIELDS)
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching smartlock metadata: {err}") from err
+
+        return {
+            info.smartlock_id: info
+            for info in map(NukiSmartlockInfo.from_api, smartlocks)
+        }
+
+    @callback
+    def async_update_devices(self) -> None:
+        """Write changed metadata to the devices of the smartlocks."""
+        registry = dr.async_get(self.hass)
+        for smartlock_id, info in (self.data or {}).items():
+            device = registry.async_get_device(identifiers={(DOMAIN, smartlock_id)})
+            if device is None:
+                continue
+            if (
+                device.name == info.name
+                and device.model == info.model
+                and device.sw_version == info.firmware_version
+                and device.hw_version == info.hardware_version
+            ):
+                continue
+            registry.async_update_device(
+                device.id,
+                name=info.name,
+                model=info.model,
+                sw_version=info.firmware_version,
+                hw_version=info.hardware_version,
+            )
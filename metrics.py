@@ -0,0 +1,218 @@
+"""Request and poll instrumentation for the Nuki Web API integration."""
+from __future__ import annotations
+
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import re
+import time
+from typing import Any
+
+from .const import METRICS_LATENCY_BUCKETS, METRICS_SAMPLE_SIZE
+
+# Numeric path segments (smartlock ids, webhook ids) collapse into one endpoint
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(method: str, endpoint: str) -> str:
+    """Return the metrics key of a request, e.g. "GET /smartlock/{id}"."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', endpoint.split('?', 1)[0])}"
+
+
+def percentile(samples: list[float], pct: float) -> float | None:
+    """Return the nearest-rank percentile of the samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class LatencyHistogram:
+    """Cumulative latency histogram plus a window of recent samples."""
+
+    buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(METRICS_LATENCY_BUCKETS) + 1)
+    )
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    recent: deque[float] = field(
+        default_factory=lambda: deque(maxlen=METRICS_SAMPLE_SIZE)
+    )
+
+    def record(self, seconds: float) -> None:
+        """Add a sample."""
+        for index, bound in enumerate(METRICS_LATENCY_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(METRICS_LATENCY_BUCKETS)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.recent.append(seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in a JSON friendly form."""
+        labels = [f"<={bound}s" for bound in METRICS_LATENCY_BUCKETS] + [
+            f">{METRICS_LATENCY_BUCKETS[-1]}s"
+        ]
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "max": round(self.maximum, 4),
+            "p50": percentile(recent, 50),
+            "p95": percentile(recent, 95),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+@dataclass
+class EndpointStats:
+    """Counters of a single endpoint."""
+
+    requests: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+    status_codes: Counter[int] = field(default_factory=Counter)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters in a JSON friendly form."""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "status_codes": dict(self.status_codes),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class NukiMetrics:
+    """API usage and timing of one Nuki account."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.started = time.time()
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.latency = LatencyHistogram()
+        self.polls = LatencyHistogram()
+        self.poll_failures = 0
+        self.last_poll_duration: float | None = None
+        self.last_poll_interval: float | None = None
+        # Wall clock time the coordinator data was last known to be good
+        self.last_good_data: float | None = None
+        # GET requests served by an identical request already in flight
+        self.coalesced: Counter[str] = Counter()
+        # Actions and state reads per path serving them (bridge or Web API)
+        self.paths: dict[str, Counter[str]] = {}
+        # Bridge requests that failed and were sent to the Web API instead
+        self.fallbacks: Counter[str] = Counter()
+        self._last_poll_started: float | None = None
+        # Monotonic timestamps of the requests made in the last hour
+        self._request_times: deque[float] = deque()
+
+    def record_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: int | None,
+        seconds: float,
+        bytes_sent: int,
+        bytes_received: int,
+        error: str | None = None,
+    ) -> None:
+        """Record a finished HTTP request."""
+        self._request_times.append(time.monotonic())
+        self.calls_last_hour()
+
+        key = normalize_endpoint(method, endpoint)
+        if (stats := self.endpoints.get(key)) is None:
+            stats = self.endpoints[key] = EndpointStats()
+        stats.requests += 1
+        if status is not None:
+            stats.status_codes[status] += 1
+        if error is not None:
+            stats.errors[error] += 1
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+        stats.latency.record(seconds)
+        self.latency.record(seconds)
+
+    def record_coalesced(self, method: str, endpoint: str) -> None:
+        """Record a request that joined an identical one in flight."""
+        self.coalesced[normalize_endpoint(method, endpoint)] += 1
+
+    def record_path(self, operation: str, path: str) -> None:
+        """Record which path served an action or state read."""
+        self.paths.setdefault(operation, Counter())[path] += 1
+
+    def record_fallback(self, operation: str) -> None:
+        """Record a bridge request that fell back to the Web API."""
+        self.fallbacks[operation] += 1
+
+    def poll_started(self) -> float:
+        """Record the start of a coordinator poll and return its start time."""
+        now = time.monotonic()
+        if self._last_poll_started is not None:
+            self.last_poll_interval = now - self._last_poll_started
+        self._last_poll_started = now
+        return now
+
+    def poll_finished(self, started: float, success: bool) -> None:
+        """Record the end of a coordinator poll."""
+        self.last_poll_duration = time.monotonic() - started
+        self.polls.record(self.last_poll_duration)
+        if not success:
+            self.poll_failures += 1
+
+    def record_good_data(self, at: float | None = None) -> None:
+        """Record when the coordinator data was fetched, now by default."""
+        self.last_good_data = time.time() if at is None else at
+
+    @property
+    def data_age(self) -> float | None:
+        """Return the seconds since the coordinator data was fetched."""
+        if self.last_good_data is None:
+            return None
+        return max(0.0, time.time() - self.last_good_data)
+
+    def calls_last_hour(self) -> int:
+        """Return the number of API requests made in the last hour."""
+        cutoff = time.monotonic() - 3600
+        while self._request_times and self._request_times[0] < cutoff:
+            self._request_times.popleft()
+        return len(self._request_times)
+
+    @property
+    def p95_latency(self) -> float | None:
+        """Return the 95th percentile of recent request latencies in seconds."""
+        return percentile(list(self.latency.recent), 95)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics in a JSON friendly form."""
+        return {
+            "uptime": round(time.time() - self.started),
+            "calls_last_hour": self.calls_last_hour(),
+            "latency": self.latency.as_dict(),
+            "endpoints": {
+                key: stats.as_dict() for key, stats in sorted(self.endpoints.items())
+            },
+            "coalesced": dict(self.coalesced),
+            "paths": {
+                operation: dict(paths) for operation, paths in self.paths.items()
+            },
+            "fallbacks": dict(self.fallbacks),
+            "polls": {
+                **self.polls.as_dict(),
+                "failures": self.poll_failures,
+                "last_duration": self.last_poll_duration,
+                "last_interval": self.last_poll_interval,
+            },
+            "data_age": self.data_age,
+        }
@@ -0,0 +1,162 @@
+"""Smartlock and authorization models for the Nuki Web API integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from .const import (
+    DEFAULT_DEVICE_MODEL,
+    DEVICE_MODELS,
+    NUKI_STATES_MAP,
+    STATE_UNDEFINED,
+)
+
+
+class LockState(StrEnum):
+    """Home Assistant lock state derived from the Nuki state."""
+
+    LOCKED = "locked"
+    UNLOCKED = "unlocked"
+    LOCKING = "locking"
+    UNLOCKING = "unlocking"
+    JAMMED = "jammed"
+    UNKNOWN = "unknown"
+
+
+_LOCK_STATES = {state: LockState(name) for state, name in NUKI_STATES_MAP.items()}
+
+
+@dataclass(slots=True, frozen=True)
+class NukiSmartlock:
+    """The fields of a /smartlock entry used by the platforms.
+
+    Parsed once per poll; the large config blocks of the API response are
+    not kept.
+    """
+
+    smartlock_id: int
+    name: str
+    device_type: int | None
+    state: int
+    lock_state: LockState
+    battery_critical: bool
+    battery_charge: int | None
+    battery_charging: bool
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> NukiSmartlock:
+        """Create the model from a /smartlock API entry."""
+        smartlock_id = data["smartlockId"]
+        state = data.get("state") or {}
+        nuki_state = state.get("state", STATE_UNDEFINED)
+        return cls(
+            smartlock_id=smartlock_id,
+            name=data.get("name", f"Nuki Lock {smartlock_id}"),
+            device_type=data.get("type"),
+            state=nuki_state,
+            lock_state=_LOCK_STATES.get(nuki_state, LockState.UNKNOWN),
+            battery_critical=state.get("batteryCritical", False),
+            battery_charge=state.get("batteryChargeState"),
+            battery_charging=state.get("batteryCharging", False),
+        )
+
+    def as_api(self) -> dict[str, Any]:
+        """Return the model in the shape of a /smartlock API entry."""
+        state: dict[str, Any] = {
+            "state": self.state,
+            "batteryCritical": self.battery_critical,
+            "batteryCharging": self.battery_charging,
+        }
+        if self.battery_charge is not None:
+            state["batteryChargeState"] = self.battery_charge
+        data: dict[str, Any] = {
+            "smartlockId": self.smartlock_id,
+            "name": self.name,
+            "state": state,
+        }
+        if self.device_type is not None:
+            data["type"] = self.device_type
+        return data
+
+    def with_changes(self, changes: dict[str, Any]) -> NukiSmartlock:
+        """Return a copy updated with a partial API-shaped payload.
+
+        A nested "state" dict is merged into the current state instead of
+        replacing it.
+        """
+        data = {**self.as_api(), **changes}
+        if isinstance(changes.get("state"), dict):
+            data["state"] = {**self.as_api()["state"], **changes["state"]}
+        return NukiSmartlock.from_api(data)
+
+
+def device_model(device_type: int | None) -> str:
+    """Return the device model name of a smartlock type."""
+    return DEVICE_MODELS.get(device_type, DEFAULT_DEVICE_MODEL)
+
+
+def format_version(version: int | str | None) -> str | None:
+    """Format a Nuki version number, e.g. 0x030510 as "3.5.16"."""
+    if not isinstance(version, int):
+        return version
+    return f"{version >> 16 & 0xFF}.{version >> 8 & 0xFF}.{version & 0xFF}"
+
+
+@dataclass(slots=True, frozen=True)
+class NukiSmartlockInfo:
+    """Slowly changing metadata of a smartlock, used for the device registry."""
+
+    smartlock_id: int
+    name: str
+    device_type: int | None
+    model: str
+    firmware_version: str | None
+    hardware_version: str | None
+    server_state: int | None
+    admin_pin_state: int | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> NukiSmartlockInfo:
+        """Create the metadata from a /smartlock API entry."""
+        smartlock_id = data["smartlockId"]
+        device_type = data.get("type")
+        return cls(
+            smartlock_id=smartlock_id,
+            name=data.get("name", f"Nuki Lock {smartlock_id}"),
+            device_type=device_type,
+            model=device_model(device_type),
+            firmware_version=format_version(data.get("firmwareVersion")),
+            hardware_version=format_version(data.get("hardwareVersion")),
+            server_state=data.get("serverState"),
+            admin_pin_state=data.get("adminPinState"),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class NukiAuth:
+    """The fields of a /smartlock/auth entry used by the integration.
+
+    Keypad codes are not kept.
+    """
+
+    auth_id: str
+    smartlock_id: int
+    name: str
+    auth_type: int | None
+    enabled: bool
+    remote_allowed: bool
+    last_active: str | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> NukiAuth:
+        """Create the model from a /smartlock/auth API entry."""
+        return cls(
+            auth_id=data["id"],
+            smartlock_id=data["smartlockId"],
+            name=data.get("name", ""),
+            auth_type=data.get("type"),
+            enabled=data.get("enabled", True),
+            remote_allowed=data.get("remoteAllowed", False),
+            last_active=data.get("lastActiveDate"),
+        )
@@ -0,0 +1,258 @@
+"""On-demand profiling of the poll cycle for the Nuki Web API integration."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+import cProfile
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+from .const import PHASE_CYCLE, PHASES, PROFILE_TOP
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .coordinator import NukiDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Functions whose cumulative time is broken out in the report
+HOTSPOTS = (
+    "json_loads",
+    "json_loads_projected",
+    "from_api",
+    "async_update_smartlock_listeners",
+    "_handle_coordinator_update",
+    "async_write_ha_state",
+)
+
+
+class ProfilerBusyError(Exception):
+    """Raised when another profiler is already active in the process."""
+
+
+@dataclass
+class PhaseStats:
+    """Wall time and peak memory of one phase over a profiling run."""
+
+    calls: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+    # Highest traced memory above the start of a call, in bytes
+    peak: int = 0
+
+    def record(self, elapsed: float, peak: int = 0) -> None:
+        """Record one call of the phase."""
+        self.calls += 1
+        self.total += elapsed
+        self.longest = max(self.longest, elapsed)
+        self.peak = max(self.peak, peak)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in milliseconds and KiB."""
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 3) if self.calls else None,
+            "max_ms": round(self.longest * 1000, 3),
+            "peak_kib": round(self.peak / 1024, 1),
+        }
+
+
+class NukiProfiler:
+    """Profile a number of poll cycles of one account.
+
+    While a run is active the API client holds the profiler in its
+    `profiler` attribute and the client and coordinator time their phases
+    through `profile_phase()`; otherwise each phase costs that call and
+    an empty nullcontext.
+    cProfile is only enabled inside the synchronous phases (decode, parse,
+    notify), so time other integrations spend in the event loop while a
+    request is awaited does not end up in the profile. tracemalloc traces
+    the whole run.
+    """
+
+    def __init__(self, coordinator: NukiDataUpdateCoordinator) -> None:
+        """Initialize the profiler."""
+        self.coordinator = coordinator
+        self.phases: dict[str, PhaseStats] = {name: PhaseStats() for name in PHASES}
+        self.failed = 0
+        self._profile = cProfile.Profile()
+        # Memory peaks are only measured when the run owns tracemalloc
+        self._owns_tracing = False
+
+    @contextmanager
+    def phase(self, name: str, profile: bool = True) -> Iterator[None]:
+        """Time a phase, profiling it unless it awaits I/O."""
+        base = 0
+        if profile:
+            if self._owns_tracing:
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            self._profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = 0
+            if profile:
+                self._profile.disable()
+                if self._owns_tracing:
+                    peak = max(0, tracemalloc.get_traced_memory()[1] - base)
+            self.phases[name].record(elapsed, peak)
+
+    async def async_run(
+        self, hass: HomeAssistant, cycles: int, path: str
+    ) -> dict[str, Any]:
+        """Refresh the coordinator `cycles` times and write a report.
+
+        The refreshes go through the regular poll path, including the rate
+        limiter and call budget. The report is written to `path` with a
+        `.txt` suffix, the raw profile next to it with `.prof` for tools
+        such as snakeviz. Raises ProfilerBusyError if another profiler is
+        active in the process.
+        """
+        coordinator = self.coordinator
+        client = coordinator.client
+        try:
+            # Python 3.12 allows one profiler per process
+            self._profile.enable()
+            self._profile.disable()
+        except ValueError as err:
+            raise ProfilerBusyError(str(err)) from err
+
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+        client.profiler = self
+        try:
+            before = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+            for _ in range(cycles):
+                with self.phase(PHASE_CYCLE, profile=False):
+                    await coordinator.async_refresh()
+                if not coordinator.last_update_success:
+                    self.failed += 1
+            after = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+        finally:
+            client.profiler = None
+            if self._owns_tracing:
+                tracemalloc.stop()
+
+        header = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "cycles": cycles,
+            "failed": self.failed,
+            "smartlocks": len(coordinator.data or {}),
+        }
+        hotspots = await hass.async_add_executor_job(
+            self._write_report, path, header, before, after
+        )
+        _LOGGER.info("Wrote Nuki Web API profile to %s.txt", path)
+        return {
+            **header,
+            "report": f"{path}.txt",
+            "profile": f"{path}.prof",
+            "phases": {
+                name: stats.as_dict()
+                for name, stats in self.phases.items()
+                if stats.calls
+            },
+            "hotspots_ms": hotspots,
+        }
+
+    def _write_report(
+        self,
+        path: str,
+        header: dict[str, Any],
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+    ) -> dict[str, float]:
+        """Write the text report and raw profile, return the hotspot times."""
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(f"{path}.prof")
+        hotspots = {
+            name: round(total * 1000, 3)
+            for name in HOTSPOTS
+            if (total := _cumulative(stats, name))
+        }
+
+        out = io.StringIO()
+        out.write("Nuki Web API poll profile\n")
+        for key, value in header.items():
+            out.write(f"{key}: {value}\n")
+
+        out.write("\nPhases (wall time)\n")
+        out.write(
+            f"{'phase':<8} {'calls':>6} {'total ms':>10} {'mean ms':>9} "
+            f"{'max ms':>9} {'peak KiB':>9}\n"
+        )
+        for name, phase in self.phases.items():
+            if not phase.calls:
+                continue
+            values = phase.as_dict()
+            out.write(
+                f"{name:<8} {values['calls']:>6} {values['total_ms']:>10.2f} "
+                f"{values['mean_ms']:>9.2f} {values['max_ms']:>9.2f} "
+                f"{values['peak_kib']:>9.1f}\n"
+            )
+
+        out.write("\nHotspots (cumulative ms)\n")
+        for name, total in hotspots.items():
+            out.write(f"{name:<34} {total:>10.2f}\n")
+
+        stats.stream = out
+        stats.strip_dirs()
+        out.write("\nTop functions by cumulative time\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+        out.write("\nTop functions by own time\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP)
+
+        out.write("\nTop allocation sites (memory still held after the run)\n")
+        ignore = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+        differences = after.filter_traces(ignore).compare_to(
+            before.filter_traces(ignore), "lineno"
+        )
+        for difference in differences[:PROFILE_TOP]:
+            out.write(f"{difference}\n")
+
+        with open(f"{path}.txt", "w", encoding="utf-8") as report:
+            report.write(out.getvalue())
+        return hotspots
+
+
+def profile_phase(
+    profiler: NukiProfiler | None, name: str, profile: bool = True
+) -> AbstractContextManager[None]:
+    """Return a context timing a phase while a profiler runs."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name, profile)
+
+
+def _cumulative(stats: pstats.Stats, name: str) -> float:
+    """Return the cumulative seconds of all functions with a name.
+
+    Nested calls of a function with the same name are not counted twice.
+    """
+    total = 0.0
+    for (_file, _line, function), (_, _, _, cumulative, callers) in (
+        stats.stats.items()  # type: ignore[attr-defined]
+    ):
+        if function != name:
+            continue
+        total += cumulative - sum(
+            caller[3]
+            for (_caller_file, _caller_line, caller_function), caller in callers.items()
+            if caller_function == name
+        )
+    return total
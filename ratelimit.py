@@ -0,0 +1,223 @@
+"""Client-side rate limiting for the Nuki Web API."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import time
+from typing import Any
+import weakref
+
+from .const import (
+    API_CIRCUIT_FAILURE_THRESHOLD,
+    API_CIRCUIT_RESET_TIMEOUT,
+    API_RATE_LIMIT_BURST,
+    API_RATE_LIMIT_PER_MINUTE,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class BucketBlockedError(Exception):
+    """Error to indicate requests are held back after a Retry-After."""
+
+    def __init__(self, retry_after: float) -> None:
+        """Initialize the error."""
+        super().__init__(f"Requests held back for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate.
+
+    Requests wait for a token instead of failing. A Retry-After from the
+    server blocks the whole bucket until it has passed; requests made
+    meanwhile fail right away instead of queueing behind the block.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Initialize the bucket with `rate` tokens per second."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accumulated since the last refill."""
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def blocked_for(self) -> float:
+        """Return the seconds until a Retry-After block has passed."""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it.
+
+        Raises BucketBlockedError while the bucket is blocked.
+        """
+        if blocked_for := self.blocked_for:
+            raise BucketBlockedError(blocked_for)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    raise BucketBlockedError(self._blocked_until - now)
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Hold back all requests for the given number of seconds."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state of the bucket."""
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "tokens": round(self._tokens, 2),
+            "capacity": self.capacity,
+            "rate_per_minute": self.rate * 60,
+            "blocked_for": round(self.blocked_for, 1),
+        }
+
+
+class CircuitBreaker:
+    """Stop sending requests while the API keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast for `reset_timeout` seconds. Then a single trial
+    request is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialize the circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        if self.state == CIRCUIT_OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+        if self._trial_running:
+            return False
+        self._trial_running = True
+        return True
+
+    def release_trial(self) -> None:
+        """Let another trial through if one ended without an outcome.
+
+        Does nothing once record_success() or record_failure() ran.
+        """
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self.consecutive_failures += 1
+        self._trial_running = False
+        if (
+            self.state == CIRCUIT_HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = CIRCUIT_OPEN
+            self._opened_at = time.monotonic()
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the open circuit lets a trial through."""
+        if self.state != CIRCUIT_OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state of the circuit."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in, 1),
+        }
+
+
+@dataclass
+class RequestGuard:
+    """Rate limiter and circuit breaker shared by all clients of a token."""
+
+    bucket: TokenBucket = field(
+        default_factory=lambda: TokenBucket(
+            API_RATE_LIMIT_PER_MINUTE / 60, API_RATE_LIMIT_BURST
+        )
+    )
+    breaker: CircuitBreaker = field(
+        default_factory=lambda: CircuitBreaker(
+            API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_RESET_TIMEOUT
+        )
+    )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state of the guard."""
+        return {
+            "rate_limit": self.bucket.as_dict(),
+            "circuit": self.breaker.as_dict(),
+        }
+
+
+_GUARDS: weakref.WeakValueDictionary[str, RequestGuard] = weakref.WeakValueDictionary()
+
+
+def get_request_guard(api_token: str) -> RequestGuard:
+    """Return the request guard shared by all clients using `api_token`."""
+    if (guard := _GUARDS.get(api_token)) is None:
+        guard = _GUARDS[api_token] = RequestGuard()
+    return guard
+
+
+def retry_delay(attempt: int) -> float:
+    """Return the jittered exponential delay before retry number `attempt`."""
+    delay = min(API_RETRY_MAX_DELAY, API_RETRY_BASE_DELAY * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
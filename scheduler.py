@@ -0,0 +1,106 @@
+"""Adaptive polling scheduler for the Nuki Web API integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+import random
+import time
+
+from .const import (
+    ACTION_FAST_POLL_WINDOW,
+    POLL_BACKOFF_FACTOR,
+    PUSH_RECONCILE_INTERVAL,
+    REVALIDATE_BACKOFF_FACTOR,
+)
+
+
+class AdaptivePollScheduler:
+    """Compute the next coordinator poll interval.
+
+    Polls at the minimum interval while any lock is moving or shortly after
+    an action, backs off geometrically towards the maximum interval while
+    the fleet is idle, and never lets the API usage exceed the hourly call
+    budget. While webhook push updates are active, polling only reconciles
+    at a slow fixed interval. Failed polls are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        call_budget: int,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.call_budget = call_budget
+        self._idle_polls = 0
+        self._last_action = 0.0
+        self._failures = 0
+        self.push_active = False
+
+    @property
+    def budget_interval(self) -> float:
+        """Return the interval that spreads the budget evenly over an hour."""
+        return 3600 / self.call_budget
+
+    @property
+    def reconcile_interval(self) -> timedelta:
+        """Return the slow poll interval used while push updates are active."""
+        return timedelta(seconds=max(PUSH_RECONCILE_INTERVAL, self.max_interval))
+
+    def note_action(self) -> None:
+        """Record that an action was just sent to a lock."""
+        self._last_action = time.monotonic()
+        self._idle_polls = 0
+
+    def is_active(self, transitional: bool) -> bool:
+        """Return True if the fleet needs fast polling."""
+        if transitional:
+            return True
+        return time.monotonic() - self._last_action < ACTION_FAST_POLL_WINDOW
+
+    def next_interval(
+        self,
+        transitional: bool,
+        changed: bool,
+        calls_last_hour: int,
+    ) -> timedelta:
+        """Return the interval until the next poll."""
+        self._failures = 0
+        if self.push_active:
+            return self.reconcile_interval
+
+        if self.is_active(transitional):
+            self._idle_polls = 0
+            interval = self.min_interval
+        else:
+            if changed:
+                self._idle_polls = 0
+            else:
+                self._idle_polls += 1
+            interval = min(
+                self.min_interval * POLL_BACKOFF_FACTOR**self._idle_polls,
+                self.max_interval,
+            )
+            # Outside of bursts, poll no faster than the sustainable rate
+            interval = max(interval, self.budget_interval)
+
+        if calls_last_hour >= self.call_budget:
+            # Budget exhausted, fall back to the slowest interval
+            interval = self.max_interval
+
+        return timedelta(seconds=interval)
+
+    def retry_interval(self) -> timedelta:
+        """Return the interval until the next poll after a failed poll.
+
+        Starts at the minimum interval and grows with every further failure
+        up to the maximum interval, jittered so accounts do not retry in
+        lockstep after an outage.
+        """
+        self._failures += 1
+        interval = min(
+            self.min_interval * REVALIDATE_BACKOFF_FACTOR ** (self._failures - 1),
+            self.max_interval,
+        )
+        return timedelta(seconds=interval * random.uniform(0.8, 1.0))
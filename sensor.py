@@ -1,24 +1,85 @@
 """Platform for Nuki Web API sensor integration."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
 import logging
 from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .account import entry_smartlocks
+from .auth import NukiAuthCoordinator
 from .const import DOMAIN
+from .metrics import NukiMetrics
+from .models import NukiSmartlock
 
 _LOGGER = logging.getLogger(__name__)
 
+# Refresh rate of the (polled) API diagnostic sensors
+SCAN_INTERVAL = timedelta(seconds=60)
+
+
+@dataclass(frozen=True, kw_only=True)
+class NukiApiSensorEntityDescription(SensorEntityDescription):
+    """Describes a Nuki Web API diagnostic sensor."""
+
+    value_fn: Callable[[NukiMetrics], float | int | None]
+
+
+def _seconds_to_ms(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+API_SENSORS: tuple[NukiApiSensorEntityDescription, ...] = (
+    NukiApiSensorEntityDescription(
+        key="api_calls_last_hour",
+        name="API calls last hour",
+        native_unit_of_measurement="calls",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.calls_last_hour(),
+    ),
+    NukiApiSensorEntityDescription(
+        key="api_latency_p95",
+        name="API latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _seconds_to_ms(metrics.p95_latency),
+    ),
+    NukiApiSensorEntityDescription(
+        key="last_poll_duration",
+        name="Last poll duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _seconds_to_ms(metrics.last_poll_duration),
+    ),
+    NukiApiSensorEntityDescription(
+        key="data_age",
+        name="Data age",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: (
+            round(metrics.data_age) if metrics.data_age is not None else None
+        ),
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -31,9 +92,21 @@ async def async_setup_entry(
     
     # Create battery sensor for each smartlock
     entities = []
-    for smartlock in coordinator.data:
+    for smartlock in entry_smartlocks(data):
         entities.append(NukiBatterySensor(coordinator, smartlock))
     
+    # Authorization counts per lock and for the account
+    if (auth := data["auth"]) is not None:
+        for smartlock in entry_smartlocks(data):
+            entities.append(NukiAuthSensor(auth, config_entry, smartlock))
+        entities.append(NukiAuthSensor(auth, config_entry))
+    
+    # API diagnostic sensors, disabled by default
+    for description in API_SENSORS:
+        entities.append(
+            NukiApiSensor(data["client"].metrics, config_entry, description)
+        )
+    
     async_add_entities(entities)
 
 
@@ -44,13 +117,12 @@ class NukiBatterySensor(CoordinatorEntity, SensorEntity):
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
-    def __init__(self, coordinator, smartlock_data: dict[str, Any]) -> None:
+    def __init__(self, coordinator, smartlock: NukiSmartlock) -> None:
         """Initialize the battery sensor."""
-        super().__init__(coordinator)
-        self._smartlock_id = smartlock_data["smartlockId"]
-        lock_name = smartlock_data.get("name", f"Nuki Lock {self._smartlock_id}")
+        super().__init__(coordinator, context=smartlock.smartlock_id)
+        self._smartlock_id = smartlock.smartlock_id
         
-        self._attr_name = f"{lock_name} Battery"
+        self._attr_name = f"{smartlock.name} Battery"
         self._attr_unique_id = f"nuki_{self._smartlock_id}_battery"
         
         # Associate with the same device as the lock
@@ -59,20 +131,18 @@ class NukiBatterySensor(CoordinatorEntity, SensorEntity):
         }
         
         # Update initial state
-        self._update_from_data(smartlock_data)
+        self._update_from_data(smartlock)
 
-    def _update_from_data(self, smartlock_data: dict[str, Any]) -> None:
+    def _update_from_data(self, smartlock: NukiSmartlock) -> None:
         """Update the sensor state from smartlock data."""
-        state = smartlock_data.get("state", {})
-        
         # Battery critical is a boolean, but we might have batteryChargeState (percentage)
         # Different Nuki models report differently:
         # - batteryChargeState: 0-100 (percentage) - newer models
         # - batteryCritical: boolean - all models
         # - batteryCharging: boolean - models with rechargeable battery
         
-        battery_charge = state.get("batteryChargeState")
-        battery_critical = state.get("batteryCritical", False)
+        battery_charge = smartlock.battery_charge
+        battery_critical = smartlock.battery_critical
         
         if battery_charge is not None:
             # We have percentage
@@ -86,13 +156,13 @@ class NukiBatterySensor(CoordinatorEntity, SensorEntity):
             self._attr_native_value = 80  # Estimate healthy battery
         
         # Store charging state as attribute
-        self._battery_charging = state.get("batteryCharging", False)
+        self._battery_charging = smartlock.battery_charging
         self._battery_critical = battery_critical
 
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
-        return self.coordinator.last_update_success
+        """Return True while the last good data is recent enough."""
+        return self.coordinator.available
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -104,10 +174,104 @@ class NukiBatterySensor(CoordinatorEntity, SensorEntity):
 
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        # Find the updated data for this specific smartlock
-        for smartlock in self.coordinator.data:
-            if smartlock["smartlockId"] == self._smartlock_id:
-                self._update_from_data(smartlock)
-                break
+        # Coordinator data is keyed by smartlockId
+        if (smartlock := self.coordinator.data.get(self._smartlock_id)) is not None:
+            self._update_from_data(smartlock)
         
         self.async_write_ha_state()
+
+
+class NukiAuthSensor(CoordinatorEntity[NukiAuthCoordinator], SensorEntity):
+    """Number of authorizations of a smartlock or of the whole account."""
+
+    _attr_icon = "mdi:account-key"
+    _attr_native_unit_of_measurement = "authorizations"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: NukiAuthCoordinator,
+        config_entry: ConfigEntry,
+        smartlock: NukiSmartlock | None = None,
+    ) -> None:
+        """Initialize the authorization sensor."""
+        super().__init__(coordinator)
+        if smartlock is None:
+            self._smartlock_id = None
+            self._attr_name = "Nuki Web API Authorizations"
+            self._attr_unique_id = f"nuki_{config_entry.entry_id}_authorizations"
+            self._attr_device_info = {
+                "identifiers": {(DOMAIN, config_entry.entry_id)},
+                "name": "Nuki Web API",
+                "manufacturer": "Nuki",
+                "entry_type": DeviceEntryType.SERVICE,
+            }
+        else:
+            self._smartlock_id = smartlock.smartlock_id
+            self._attr_name = f"{smartlock.name} Authorizations"
+            self._attr_unique_id = f"nuki_{self._smartlock_id}_authorizations"
+            self._attr_device_info = {
+                "identifiers": {(DOMAIN, self._smartlock_id)},
+            }
+        self._summary: dict[str, int] = {}
+        self._update_from_data()
+
+    def _update_from_data(self) -> None:
+        """Update the counts from the synced authorizations."""
+        self._summary = self.coordinator.summary(self._smartlock_id)
+
+    @property
+    def available(self) -> bool:
+        """Return True once authorizations were synced successfully."""
+        return (
+            self.coordinator.last_update_success
+            and self.coordinator.data is not None
+        )
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the number of authorizations."""
+        return self._summary.get("total")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the counts per authorization type."""
+        return {key: value for key, value in self._summary.items() if key != "total"}
+
+    def _handle_coordinator_update(self) -> None:
+        """Handle a changed authorization list."""
+        self._update_from_data()
+        self.async_write_ha_state()
+
+
+class NukiApiSensor(SensorEntity):
+    """Diagnostic sensor exposing API usage of a config entry."""
+
+    entity_description: NukiApiSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        metrics: NukiMetrics,
+        config_entry: ConfigEntry,
+        description: NukiApiSensorEntityDescription,
+    ) -> None:
+        """Initialize the diagnostic sensor."""
+        self.entity_description = description
+        self._metrics = metrics
+        self._attr_name = f"Nuki Web API {description.name}"
+        self._attr_unique_id = f"nuki_{config_entry.entry_id}_{description.key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": "Nuki Web API",
+            "manufacturer": "Nuki",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value from the API metrics."""
+        return self.entity_description.value_fn(self._metrics)
@@ -0,0 +1,401 @@
+"""Services for the Nuki Web API integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.lock import DOMAIN as LOCK_DOMAIN
+from homeassistant.const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_ENTITY_ID,
+    ENTITY_MATCH_ALL,
+)
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+from homeassistant.util import dt as dt_util
+
+from .account import NukiAccount, account_key
+from .activity import format_date
+from .const import (
+    ACTION_LOCK,
+    ACTION_LOCK_N_GO,
+    ACTION_LOCK_N_GO_UNLATCH,
+    ACTION_UNLATCH,
+    ACTION_UNLOCK,
+    AUTH_DELETE_BATCH_SIZE,
+    AUTH_TYPE_KEYPAD_CODE,
+    DATA_PROFILING,
+    DEFAULT_BULK_CONCURRENCY,
+    DOMAIN,
+    PROFILE_DEFAULT_CYCLES,
+    PROFILE_MAX_CYCLES,
+)
+from .profiler import NukiProfiler, ProfilerBusyError
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BULK_ACTION = "bulk_action"
+SERVICE_BULK_ADD_AUTHORIZATION = "bulk_add_authorization"
+SERVICE_BULK_REVOKE_AUTHORIZATION = "bulk_revoke_authorization"
+SERVICE_PROFILE = "profile"
+
+ATTR_ACTION = "action"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_NAME = "name"
+ATTR_CODE = "code"
+ATTR_ALLOWED_FROM = "allowed_from"
+ATTR_ALLOWED_UNTIL = "allowed_until"
+ATTR_AUTH_ID = "auth_id"
+ATTR_CYCLES = "cycles"
+
+BULK_ACTION_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Required(ATTR_ACTION): vol.All(
+            vol.Coerce(int),
+            vol.In(
+                [
+                    ACTION_UNLOCK,
+                    ACTION_LOCK,
+                    ACTION_UNLATCH,
+                    ACTION_LOCK_N_GO,
+                    ACTION_LOCK_N_GO_UNLATCH,
+                ]
+            ),
+        ),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_BULK_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=20)
+        ),
+    }
+)
+
+
+def keypad_code(value: Any) -> int:
+    """Validate a Nuki keypad code: six digits 1-9, not starting with 12."""
+    code = str(value)
+    if len(code) != 6 or not code.isdigit() or "0" in code or code.startswith("12"):
+        raise vol.Invalid("keypad codes have six digits 1-9 and do not start with 12")
+    return int(code)
+
+
+BULK_ADD_AUTHORIZATION_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Required(ATTR_NAME): vol.All(cv.string, vol.Length(min=1, max=32)),
+        vol.Required(ATTR_CODE): keypad_code,
+        vol.Optional(ATTR_ALLOWED_FROM): cv.datetime,
+        vol.Optional(ATTR_ALLOWED_UNTIL): cv.datetime,
+    }
+)
+
+BULK_REVOKE_AUTHORIZATION_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            # Targets are optional, without any every synced lock is searched
+            **cv.ENTITY_SERVICE_FIELDS,
+            vol.Optional(ATTR_NAME): cv.string,
+            vol.Optional(ATTR_AUTH_ID): vol.All(cv.ensure_list, [cv.string]),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_NAME, ATTR_AUTH_ID),
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=PROFILE_DEFAULT_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_CYCLES)
+        ),
+    }
+)
+
+
+def _resolve_locks(
+    hass: HomeAssistant,
+    call: ServiceCall,
+    results: dict[str, dict[str, Any]],
+) -> list[tuple[str, str, int]]:
+    """Map the targeted lock entities to (entity_id, config entry id, smartlockId).
+
+    Entity, device, area, floor and label targets are resolved. Entities
+    named explicitly that are not loaded Nuki locks are reported in
+    `results`; other entities of targeted devices and areas are skipped.
+    """
+    registry = er.async_get(hass)
+    loaded = hass.data.get(DOMAIN, {})
+    selected = async_extract_referenced_entity_ids(hass, call)
+    indirect = selected.indirectly_referenced
+    if call.data.get(ATTR_ENTITY_ID) == ENTITY_MATCH_ALL:
+        indirect = {
+            entry.entity_id
+            for entry in registry.entities.values()
+            if entry.platform == DOMAIN and entry.domain == LOCK_DOMAIN
+        }
+    targets: list[tuple[str, str, int]] = []
+    for entity_id in sorted(selected.referenced | indirect):
+        entry = registry.async_get(entity_id)
+        if (
+            entry is None
+            or entry.platform != DOMAIN
+            or entry.domain != LOCK_DOMAIN
+            or entry.config_entry_id not in loaded
+        ):
+            if entity_id in selected.referenced:
+                results[entity_id] = {"success": False, "error": "not a Nuki lock"}
+            continue
+        smartlock_id = int(entry.unique_id.removeprefix("nuki_"))
+        targets.append((entity_id, entry.config_entry_id, smartlock_id))
+    return targets
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_bulk_action(call: ServiceCall) -> ServiceResponse:
+        """Send one action to many locks with bounded concurrency."""
+        action = call.data[ATTR_ACTION]
+        semaphore = asyncio.Semaphore(call.data[ATTR_MAX_CONCURRENCY])
+        loaded = hass.data.get(DOMAIN, {})
+
+        results: dict[str, dict[str, Any]] = {}
+        targets = [
+            (entity_id, loaded[entry_id], smartlock_id)
+            for entity_id, entry_id, smartlock_id in _resolve_locks(hass, call, results)
+        ]
+
+        async def async_run(
+            entity_id: str, data: dict[str, Any], smartlock_id: int
+        ) -> None:
+            """Send the action to a single lock."""
+            async with semaphore:
+                try:
+                    sent = await data["commands"].async_send(smartlock_id, action)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning(
+                        "Bulk action %s failed on Nuki lock %s: %s",
+                        action,
+                        smartlock_id,
+                        err,
+                    )
+                    results[entity_id] = {
+                        "smartlock_id": smartlock_id,
+                        "success": False,
+                        "error": str(err),
+                    }
+                else:
+                    results[entity_id] = {
+                        "smartlock_id": smartlock_id,
+                        "success": True,
+                        # A newer action on the lock replaced this one
+                        "superseded": not sent,
+                    }
+
+        await asyncio.gather(*(async_run(*target) for target in targets))
+
+        # One consolidated refresh per account instead of one per lock
+        coordinators = {
+            id(data["coordinator"]): data["coordinator"] for _, data, _ in targets
+        }
+        for coordinator in coordinators.values():
+            coordinator.async_note_action()
+            await coordinator.async_request_refresh()
+
+        return {"results": results}
+
+    async def async_bulk_add_authorization(call: ServiceCall) -> ServiceResponse:
+        """Create one keypad code on many locks, one request per account."""
+        loaded = hass.data.get(DOMAIN, {})
+        auth: dict[str, Any] = {
+            "name": call.data[ATTR_NAME],
+            "type": AUTH_TYPE_KEYPAD_CODE,
+            "code": call.data[ATTR_CODE],
+        }
+        if ATTR_ALLOWED_FROM in call.data:
+            auth["allowedFromDate"] = format_date(call.data[ATTR_ALLOWED_FROM])
+        if ATTR_ALLOWED_UNTIL in call.data:
+            auth["allowedUntilDate"] = format_date(call.data[ATTR_ALLOWED_UNTIL])
+
+        results: dict[str, dict[str, Any]] = {}
+        # Entries of one account share its client, so their locks go into
+        # one request
+        accounts: dict[str, tuple[NukiAccount, list[tuple[str, int]]]] = {}
+        for entity_id, entry_id, smartlock_id in _resolve_locks(hass, call, results):
+            account: NukiAccount = loaded[entry_id]["account"]
+            key = account_key(account.client.api_token)
+            accounts.setdefault(key, (account, []))[1].append((entity_id, smartlock_id))
+
+        for account, locks in accounts.values():
+            error: str | None = None
+            try:
+                await account.client.add_auth(
+                    [smartlock_id for _, smartlock_id in locks], auth
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Adding Nuki authorization failed: %s", err)
+                error = str(err)
+            for entity_id, smartlock_id in locks:
+                results[entity_id] = {
+                    "smartlock_id": smartlock_id,
+                    "success": error is None,
+                    **({"error": error} if error is not None else {}),
+                }
+            if account.auth is not None:
+                await account.auth.async_request_refresh()
+
+        return {"results": results}
+
+    async def async_bulk_revoke_authorization(call: ServiceCall) -> ServiceResponse:
+        """Revoke authorizations by name or id in batched requests."""
+        loaded = hass.data.get(DOMAIN, {})
+        name = call.data.get(ATTR_NAME)
+        auth_ids = set(call.data.get(ATTR_AUTH_ID, []))
+
+        results: dict[str, dict[str, Any]] = {}
+        smartlocks: dict[str, set[int]] | None = None
+        if any(str(key) in call.data for key in cv.ENTITY_SERVICE_FIELDS):
+            smartlocks = {}
+            for _, entry_id, smartlock_id in _resolve_locks(hass, call, results):
+                smartlocks.setdefault(entry_id, set()).add(smartlock_id)
+
+        synced = [
+            (entry_id, data)
+            for entry_id, data in loaded.items()
+            if data["auth"] is not None
+            and (smartlocks is None or entry_id in smartlocks)
+        ]
+        if not synced:
+            raise HomeAssistantError(
+                "Enable authorization sync in the Nuki Web API options "
+                "to revoke authorizations"
+            )
+
+        registry = er.async_get(hass)
+        handled: set[str] = set()
+        for entry_id, data in synced:
+            coordinator = data["auth"]
+            # Names and ids are resolved against the cached list
+            await coordinator.async_ensure_fresh()
+            # Entries sharing an account list the same authorizations; each
+            # only revokes those of its own smartlocks, once
+            entry_smartlocks = data["smartlock_ids"]
+            matches = [
+                auth
+                for auth in coordinator.auths()
+                if (smartlocks is None or auth.smartlock_id in smartlocks[entry_id])
+                and (entry_smartlocks is None or auth.smartlock_id in entry_smartlocks)
+                and auth.auth_id not in handled
+                and (auth.auth_id in auth_ids or (name and auth.name == name))
+            ]
+            handled.update(auth.auth_id for auth in matches)
+            for start in range(0, len(matches), AUTH_DELETE_BATCH_SIZE):
+                batch = matches[start : start + AUTH_DELETE_BATCH_SIZE]
+                error: str | None = None
+                try:
+                    await data["client"].delete_auths(
+                        [auth.auth_id for auth in batch]
+                    )
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Revoking Nuki authorizations failed: %s", err)
+                    error = str(err)
+                for auth in batch:
+                    # Keyed by lock entity like the other bulk services
+                    entity_id = registry.async_get_entity_id(
+                        LOCK_DOMAIN, DOMAIN, f"nuki_{auth.smartlock_id}"
+                    ) or str(auth.smartlock_id)
+                    result = results.setdefault(
+                        entity_id,
+                        {
+                            "smartlock_id": auth.smartlock_id,
+                            "success": True,
+                            "revoked": [],
+                            "errors": [],
+                        },
+                    )
+                    if error is None:
+                        result["revoked"].append(auth.auth_id)
+                    else:
+                        result["success"] = False
+                        result["errors"].append(
+                            {"auth_id": auth.auth_id, "error": error}
+                        )
+            if matches:
+                await coordinator.async_request_refresh()
+
+        return {"results": results}
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile poll cycles of the loaded accounts and write reports.
+
+        Accounts are profiled one after the other, as only one profiler can
+        run per process. Reports go to the configuration directory.
+        """
+        loaded = hass.data.get(DOMAIN, {})
+        if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is not None:
+            if entry_id not in loaded:
+                raise HomeAssistantError(f"Config entry {entry_id} is not loaded")
+            entries = [loaded[entry_id]]
+        else:
+            entries = list(loaded.values())
+        # Entries of one account share its coordinator
+        accounts: dict[str, NukiAccount] = {
+            account_key(data["account"].client.api_token): data["account"]
+            for data in entries
+        }
+        if not accounts:
+            raise HomeAssistantError("No Nuki Web API account is loaded")
+        if hass.data.get(DATA_PROFILING):
+            raise HomeAssistantError("A Nuki Web API profile is already running")
+
+        hass.data[DATA_PROFILING] = True
+        stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+        results: dict[str, dict[str, Any]] = {}
+        try:
+            for key, account in accounts.items():
+                results[key] = await NukiProfiler(account.coordinator).async_run(
+                    hass,
+                    call.data[ATTR_CYCLES],
+                    hass.config.path(f"{DOMAIN}_profile_{key}_{stamp}"),
+                )
+        except ProfilerBusyError as err:
+            raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+        finally:
+            hass.data.pop(DATA_PROFILING, None)
+        return {"accounts": results}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_ACTION,
+        async_bulk_action,
+        schema=BULK_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_ADD_AUTHORIZATION,
+        async_bulk_add_authorization,
+        schema=BULK_ADD_AUTHORIZATION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_REVOKE_AUTHORIZATION,
+        async_bulk_revoke_authorization,
+        schema=BULK_REVOKE_AUTHORIZATION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,193 @@
+"""Local stand-in for the HTTP API of a Nuki Bridge.
+
+Serves `/info`, `/list`, `/lockState` and `/lockAction` for a few
+synthetic smart locks and checks the hashed token like a real bridge.
+Actions move a lock through its transitional state before it settles.
+Point the bridge options of the integration at it, e.g. host
+``localhost``, port ``8090`` and token ``abc123``.
+
+Usage:
+    python tools/fake_bridge.py --token abc123 --locks 3 --latency 0.05
+
+The Web API smartlockId of a stand-in lock is printed on start; it is
+the nukiId for smart locks of device type 0. Use ``--error-rate`` to make
+the bridge answer with HTTP 503 and exercise the Web API fallback.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import hashlib
+import random
+import time
+
+from aiohttp import web
+
+# Nuki states used by the stand-in
+STATE_NAMES = {
+    1: "locked",
+    2: "unlocking",
+    3: "unlocked",
+    4: "locking",
+    5: "unlatched",
+    6: "unlocked (lock 'n' go)",
+    7: "unlatching",
+}
+
+# Action code -> (transitional state, final state)
+ACTION_STATES = {
+    1: (2, 3),
+    2: (4, 1),
+    3: (7, 5),
+    4: (2, 6),
+    5: (7, 6),
+}
+
+# Seconds a hashed token timestamp may differ from the bridge clock
+TOKEN_MAX_SKEW = 60
+
+
+def build_app(
+    token: str, locks: int, latency: float, error_rate: float, duration: float
+) -> web.Application:
+    """Build the stand-in application."""
+    app = web.Application()
+    devices = {
+        1000 + index: {
+            "nukiId": 1000 + index,
+            "deviceType": 0,
+            "name": f"Fake Lock {index + 1}",
+            "firmwareVersion": "2.14.0",
+            "lastKnownState": {
+                "mode": 2,
+                "state": 1,
+                "stateName": STATE_NAMES[1],
+                "batteryCritical": False,
+                "batteryCharging": False,
+                "batteryChargeState": 80,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            },
+        }
+        for index in range(locks)
+    }
+    used_rnr: set[tuple[str, str]] = set()
+    tasks: set[asyncio.Task] = set()
+
+    def set_state(device: dict, state: int) -> None:
+        device["lastKnownState"].update(
+            state=state,
+            stateName=STATE_NAMES[state],
+            timestamp=datetime.now(timezone.utc).isoformat(),
+        )
+
+    async def settle(device: dict, state: int) -> None:
+        await asyncio.sleep(duration)
+        set_state(device, state)
+        print(f"{device['nukiId']} -> {STATE_NAMES[state]}")
+
+    def authorized(request: web.Request) -> bool:
+        query = request.query
+        if query.get("token") == token:
+            return True
+        ts, rnr, digest = query.get("ts"), query.get("rnr"), query.get("hash")
+        if not ts or not rnr or not digest or (ts, rnr) in used_rnr:
+            return False
+        sent = datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").replace(
+            tzinfo=timezone.utc
+        )
+        if abs(time.time() - sent.timestamp()) > TOKEN_MAX_SKEW:
+            return False
+        used_rnr.add((ts, rnr))
+        expected = hashlib.sha256(f"{ts},{rnr},{token}".encode()).hexdigest()
+        return digest == expected
+
+    @web.middleware
+    async def bridge_behaviour(request: web.Request, handler):
+        await asyncio.sleep(latency)
+        if random.random() < error_rate:
+            return web.Response(status=503)
+        if not authorized(request):
+            return web.Response(status=401)
+        return await handler(request)
+
+    def device_of(request: web.Request) -> dict:
+        device = devices.get(int(request.query.get("nukiId", 0)))
+        if device is None:
+            raise web.HTTPNotFound()
+        return device
+
+    async def info(request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "bridgeType": 1,
+                "ids": {"hardwareId": 1, "serverId": 1},
+                "currentTime": datetime.now(timezone.utc).isoformat(),
+                "scanResults": [
+                    {"nukiId": nuki_id, "deviceType": 0, "name": device["name"]}
+                    for nuki_id, device in devices.items()
+                ],
+            }
+        )
+
+    async def list_devices(request: web.Request) -> web.Response:
+        return web.json_response(list(devices.values()))
+
+    async def lock_state(request: web.Request) -> web.Response:
+        return web.json_response(
+            {**device_of(request)["lastKnownState"], "success": True}
+        )
+
+    async def lock_action(request: web.Request) -> web.Response:
+        device = device_of(request)
+        action = int(request.query.get("action", 0))
+        if action not in ACTION_STATES:
+            return web.json_response({"success": False})
+        transitional, final = ACTION_STATES[action]
+        set_state(device, transitional)
+        print(f"{device['nukiId']} action {action} -> {STATE_NAMES[transitional]}")
+        task = asyncio.create_task(settle(device, final))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return web.json_response({"success": True, "batteryCritical": False})
+
+    app.middlewares.append(bridge_behaviour)
+    app.router.add_get("/info", info)
+    app.router.add_get("/list", list_devices)
+    app.router.add_get("/lockState", lock_state)
+    app.router.add_get("/lockAction", lock_action)
+    for nuki_id, device in devices.items():
+        print(f"{device['name']}: nukiId/smartlockId {nuki_id}")
+    return app
+
+
+def main() -> None:
+    """Run the stand-in server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token", default="abc123")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--locks", type=int, default=3)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to each response"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="probability of HTTP 503"
+    )
+    parser.add_argument(
+        "--action-duration",
+        type=float,
+        default=1.0,
+        help="seconds a lock spends in the transitional state",
+    )
+    args = parser.parse_args()
+
+    web.run_app(
+        build_app(
+            args.token, args.locks, args.latency, args.error_rate, args.action_duration
+        ),
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
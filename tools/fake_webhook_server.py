@@ -0,0 +1,102 @@
+"""Local stand-in for the Nuki Web API decentral webhook feature.
+
+Serves the webhook registration endpoints of the Nuki Web API and, once
+Home Assistant has registered its webhook, posts recorded events to it with
+a valid signature. The integration always talks to api.nuki.io; the
+stand-in is meant for scripts that create a NukiWebApiClient directly with
+``base_url="http://localhost:8089"``.
+
+Usage:
+    python tools/fake_webhook_server.py tools/webhook_payloads.json
+
+Each recorded event is ``{"delay": seconds, "payload": {...}}``; the delay
+is waited before the event is posted.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+
+import aiohttp
+from aiohttp import web
+
+SIGNATURE_HEADER = "X-Nuki-Signature-SHA256"
+
+
+async def replay(url: str, secret: str, events: list[dict], speed: float) -> None:
+    """Post the recorded events to the registered webhook URL."""
+    async with aiohttp.ClientSession() as session:
+        for event in events:
+            await asyncio.sleep(event.get("delay", 0) / speed)
+            body = json.dumps(event["payload"]).encode()
+            signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            async with session.post(
+                url,
+                data=body,
+                headers={
+                    "Content-Type": "application/json",
+                    SIGNATURE_HEADER: signature,
+                },
+            ) as response:
+                print(f"{event['payload'].get('feature')} -> {response.status}")
+
+
+def build_app(events: list[dict], speed: float) -> web.Application:
+    """Build the stand-in application."""
+    app = web.Application()
+    webhooks: dict[int, dict] = {}
+    next_id = iter(range(1, 1_000_000))
+
+    async def register(request: web.Request) -> web.Response:
+        data = await request.json()
+        webhook = {
+            "id": next(next_id),
+            "secret": secrets.token_hex(20),
+            "webhookUrl": data["webhookUrl"],
+            "webhookFeatures": data.get("webhookFeatures", []),
+        }
+        webhooks[webhook["id"]] = webhook
+        print(f"Registered webhook {webhook['id']} -> {webhook['webhookUrl']}")
+        app["tasks"].add(
+            asyncio.create_task(
+                replay(webhook["webhookUrl"], webhook["secret"], events, speed)
+            )
+        )
+        return web.json_response(webhook)
+
+    async def list_webhooks(request: web.Request) -> web.Response:
+        return web.json_response(list(webhooks.values()))
+
+    async def delete(request: web.Request) -> web.Response:
+        webhooks.pop(int(request.match_info["webhook_id"]), None)
+        return web.Response(status=204)
+
+    app["tasks"] = set()
+    app.router.add_get("/api/decentralWebhook", list_webhooks)
+    app.router.add_put("/api/decentralWebhook", register)
+    app.router.add_delete("/api/decentralWebhook/{webhook_id}", delete)
+    return app
+
+
+def main() -> None:
+    """Run the stand-in server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("events", help="JSON file with recorded webhook events")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed multiplier"
+    )
+    args = parser.parse_args()
+
+    with open(args.events, encoding="utf-8") as file:
+        events = json.load(file)
+
+    web.run_app(build_app(events, args.speed), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Action completion tracking for the Nuki Web API integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    ACTION_TARGET_STATES,
+    ACTION_TRACK_DELAYS,
+    ACTION_TRACK_TIMEOUT,
+    STATE_MOTOR_BLOCKED,
+)
+from .coordinator import NukiDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _TrackedAction:
+    """Pending action waiting for its lock to settle."""
+
+    target_states: frozenset[int]
+    deadline: float
+    attempt: int = 0
+    # Called with True once the lock settled, False on timeout
+    on_finished: Callable[[bool], None] | None = None
+
+
+class NukiActionTracker:
+    """Poll single smartlocks after an action until they settle.
+
+    One task runs per smartlock. A new action on a lock that is already
+    tracked replaces the target and deadline of the running task instead
+    of starting another one.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: NukiDataUpdateCoordinator
+    ) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._pending: dict[int, _TrackedAction] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    @callback
+    def async_track(
+        self,
+        smartlock_id: int,
+        action: int,
+        on_finished: Callable[[bool], None] | None = None,
+    ) -> None:
+        """Start waiting for the lock to reach the terminal state of an action.
+
+        `on_finished` is not called when the wait is cancelled or replaced
+        by a newer action on the same lock.
+        """
+        self.coordinator.async_note_action()
+        self._pending[smartlock_id] = _TrackedAction(
+            target_states=ACTION_TARGET_STATES[action],
+            deadline=self.hass.loop.time() + ACTION_TRACK_TIMEOUT,
+            on_finished=on_finished,
+        )
+
+        task = self._tasks.get(smartlock_id)
+        if task is not None and not task.done():
+            # The running task picks up the new target on its next poll
+            return
+
+        self._tasks[smartlock_id] = self.hass.async_create_background_task(
+            self._async_wait(smartlock_id),
+            f"{self.coordinator.name} track smartlock {smartlock_id}",
+        )
+
+    async def _async_wait(self, smartlock_id: int) -> None:
+        """Poll the smartlock until it reaches the target state or times out."""
+        try:
+            while (tracked := self._pending.get(smartlock_id)) is not None:
+                if self.hass.loop.time() >= tracked.deadline:
+                    smartlock = (self.coordinator.data or {}).get(smartlock_id)
+                    _LOGGER.warning(
+                        "Nuki lock %s did not reach state %s within %s seconds, "
+                        "it reports state %s",
+                        smartlock_id,
+                        sorted(tracked.target_states),
+                        ACTION_TRACK_TIMEOUT,
+                        smartlock.state if smartlock is not None else None,
+                    )
+                    if tracked.on_finished is not None:
+                        tracked.on_finished(False)
+                    return
+
+                delay = ACTION_TRACK_DELAYS[
+                    min(tracked.attempt, len(ACTION_TRACK_DELAYS) - 1)
+                ]
+                tracked.attempt += 1
+                await asyncio.sleep(delay)
+                await self.coordinator.async_refresh_smartlock(smartlock_id)
+
+                # A newer action may have replaced the target while sleeping
+                tracked = self._pending.get(smartlock_id)
+                smartlock = (self.coordinator.data or {}).get(smartlock_id)
+                state = smartlock.state if smartlock is not None else None
+                if tracked is not None and (
+                    state in tracked.target_states or state == STATE_MOTOR_BLOCKED
+                ):
+                    _LOGGER.debug(
+                        "Nuki lock %s settled in state %s", smartlock_id, state
+                    )
+                    if tracked.on_finished is not None:
+                        tracked.on_finished(True)
+                    return
+        finally:
+            self._pending.pop(smartlock_id, None)
+            self._tasks.pop(smartlock_id, None)
+
+    async def async_cancel(self) -> None:
+        """Cancel all pending waits."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._tasks.clear()
@@ -0,0 +1,588 @@
+"""Pluggable HTTP transports for the Nuki Web API client.
+
+The client hands every HTTP exchange to a transport. Besides the default
+aiohttp transport there are transports to record real traffic to a
+compact file, to replay such a recording at real or accelerated speed,
+and to serve a synthetic fleet of any size built from smartlock
+templates, so the client, coordinator and entities can be exercised
+without the cloud.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+import copy
+from dataclasses import dataclass
+import gzip
+import json
+import logging
+import random
+import re
+import time
+from typing import IO, Any
+from urllib.parse import urlsplit
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .const import (
+    API_CONNECTION_LIMIT,
+    API_DNS_CACHE_TTL,
+    API_KEEPALIVE_TIMEOUT,
+    RECORDING_FLUSH_SIZE,
+    RECORDING_FORMAT,
+    STATE_LOCKED,
+    STATE_LOCKING,
+    STATE_UNLATCHED,
+    STATE_UNLATCHING,
+    STATE_UNLOCKED,
+    STATE_UNLOCKED_LOCK_N_GO,
+    STATE_UNLOCKING,
+)
+from .json_codec import json_dumps, json_loads
+from .metrics import normalize_endpoint
+
+_LOGGER = logging.getLogger(__name__)
+
+# Action code -> (transitional state, final state) of the synthetic fleet
+ACTION_STATES = {
+    1: (STATE_UNLOCKING, STATE_UNLOCKED),
+    2: (STATE_LOCKING, STATE_LOCKED),
+    3: (STATE_UNLATCHING, STATE_UNLATCHED),
+    4: (STATE_UNLOCKING, STATE_UNLOCKED_LOCK_N_GO),
+    5: (STATE_UNLATCHING, STATE_UNLOCKED_LOCK_N_GO),
+}
+ACTION_NAMES = {"unlock": 1, "lock": 2, "unlatch": 3}
+
+# Fields never written to a recording, e.g. keypad codes of authorizations
+_REDACTED_FIELDS = frozenset({"code"})
+_REDACTED = "**REDACTED**"
+
+_SMARTLOCK_PATH = re.compile(r"^/smartlock/(\d+)(/action(?:/(\w+))?|/log)?$")
+
+
+@dataclass(slots=True, frozen=True)
+class TransportResponse:
+    """An HTTP response as seen by the client."""
+
+    status: int
+    reason: str
+    content_type: str
+    retry_after: str | None
+    content: bytes
+
+
+def response_error(
+    method: str, url: str, response: TransportResponse
+) -> aiohttp.ClientResponseError:
+    """Return the error aiohttp raises for an unsuccessful response."""
+    headers = CIMultiDictProxy(CIMultiDict())
+    return aiohttp.ClientResponseError(
+        aiohttp.RequestInfo(URL(url), method, headers, URL(url)),
+        (),
+        status=response.status,
+        message=response.reason,
+    )
+
+
+def _endpoint(url: str) -> str:
+    """Return the path and query of a URL."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def _json_response(data: Any) -> TransportResponse:
+    """Return a successful JSON response."""
+    return TransportResponse(200, "OK", "application/json", None, json_dumps(data))
+
+
+def _redact(value: Any) -> Any:
+    """Return a decoded JSON value with the redacted fields replaced."""
+    if isinstance(value, dict):
+        return {
+            key: _REDACTED if key in _REDACTED_FIELDS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    """Open a recording or template as text, gzipped if it ends in `.gz`."""
+    if path.endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _empty_response(status: int) -> TransportResponse:
+    """Return a response without content."""
+    return TransportResponse(status, "", "", None, b"")
+
+
+class NukiTransport(ABC):
+    """Send the HTTP requests of a client."""
+
+    @abstractmethod
+    async def async_send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Send a request and return its response.
+
+        Unsuccessful statuses are returned, not raised; network errors and
+        timeouts are raised like aiohttp does.
+        """
+
+    async def async_close(self) -> None:
+        """Release the resources of the transport."""
+
+
+class HttpTransport(NukiTransport):
+    """Send requests over a pooled aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession | None = None) -> None:
+        """Initialize the transport.
+
+        When no session is given, a pooled session is created lazily on the
+        first request and closed in async_close().
+        """
+        self._session = session
+        self._owns_session = session is None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating a pooled one if needed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=API_CONNECTION_LIMIT,
+                ttl_dns_cache=API_DNS_CACHE_TTL,
+                keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def async_send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Send a request over the session."""
+        async with self._get_session().request(
+            method,
+            url,
+            headers=headers,
+            data=body,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            content = b"" if response.status == 204 else await response.read()
+            return TransportResponse(
+                response.status,
+                response.reason or "",
+                response.content_type,
+                response.headers.get("Retry-After"),
+                content,
+            )
+
+    async def async_close(self) -> None:
+        """Close the session if it is owned by the transport."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+
+def _recorded_body(response: TransportResponse) -> str:
+    """Return the body of a response as recorded, with fields redacted."""
+    if response.content_type == "application/json" and any(
+        f'"{field}"'.encode() in response.content for field in _REDACTED_FIELDS
+    ):
+        return json_dumps(_redact(json_loads(response.content))).decode()
+    return response.content.decode("utf-8", "replace")
+
+
+class RecordingTransport(NukiTransport):
+    """Record the exchanges of another transport to a JSON lines file.
+
+    The first line describes the recording, every further line one
+    exchange: offset since the start and duration in seconds, method,
+    path with query, request body, status, content type, Retry-After and
+    the response body, or the error raised instead. Headers, and with
+    them the API token, are not recorded; response bodies are, so a
+    recording of a real account contains its lock names and states.
+    Keypad codes are replaced in request and response bodies. The file
+    is gzipped when its path ends in `.gz`.
+    """
+
+    def __init__(self, inner: NukiTransport, path: str) -> None:
+        """Initialize the transport."""
+        self._inner = inner
+        self.path = path
+        self._started = time.monotonic()
+        self._pending: list[dict[str, Any]] = [
+            {
+                "format": RECORDING_FORMAT,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+        ]
+        self._flushing: asyncio.Future | None = None
+
+    async def async_send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Send a request through the inner transport and record it."""
+        started = time.monotonic()
+        record: dict[str, Any] = {
+            "t": round(started - self._started, 4),
+            "m": method,
+            "e": _endpoint(url),
+            "q": _redact(json_loads(body)) if body else None,
+        }
+        try:
+            response = await self._inner.async_send(method, url, headers, body, timeout)
+        except Exception as err:
+            record["d"] = round(time.monotonic() - started, 4)
+            record["x"] = type(err).__name__
+            self._add(record)
+            raise
+
+        record.update(
+            d=round(time.monotonic() - started, 4),
+            s=response.status,
+            ct=response.content_type,
+            ra=response.retry_after,
+            b=_recorded_body(response),
+        )
+        self._add(record)
+        return response
+
+    def _add(self, record: dict[str, Any]) -> None:
+        """Queue a record, writing the queue once it is large enough."""
+        self._pending.append(record)
+        if len(self._pending) >= RECORDING_FLUSH_SIZE and self._flushing is None:
+            self._flushing = asyncio.ensure_future(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Append the queued records to the file in an executor."""
+        try:
+            while self._pending:
+                records, self._pending = self._pending, []
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._write, records
+                )
+        finally:
+            self._flushing = None
+
+    def _write(self, records: list[dict[str, Any]]) -> None:
+        """Append records to the file, as a new gzip member for `.gz` paths."""
+        with _open(self.path, "a") as file:
+            for record in records:
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    async def async_close(self) -> None:
+        """Write the remaining records and close the inner transport."""
+        if self._flushing is not None:
+            await self._flushing
+        await self._async_flush()
+        await self._inner.async_close()
+
+
+def load_recording(path: str) -> list[dict[str, Any]]:
+    """Return the exchanges of a recording, oldest first.
+
+    Recordings appended to an existing file are concatenated.
+    """
+    with _open(path, "r") as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    if not records or records[0].get("format") != RECORDING_FORMAT:
+        raise ValueError(f"{path} is not a Nuki Web API recording")
+    return [record for record in records if "format" not in record]
+
+
+class ReplayTransport(NukiTransport):
+    """Answer requests with the responses of a recording.
+
+    Requests are matched by method and path, falling back to the
+    endpoint with ids removed, and get the recorded responses of that
+    endpoint in order; the last one is repeated once they run out.
+    Responses are delivered after their recorded duration and not before
+    their recorded offset, both divided by `speed`. A speed of 0 answers
+    at once.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0) -> None:
+        """Initialize the transport from a recording file."""
+        self.speed = speed
+        self._exact: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        self._normalized: dict[str, list[dict[str, Any]]] = {}
+        self._positions: dict[Any, int] = {}
+        for record in load_recording(path):
+            path_only = record["e"].split("?", 1)[0]
+            self._exact.setdefault((record["m"], path_only), []).append(record)
+            self._normalized.setdefault(
+                normalize_endpoint(record["m"], path_only), []
+            ).append(record)
+        self._started: float | None = None
+
+    def _next(self, key: Any, records: list[dict[str, Any]]) -> dict[str, Any]:
+        """Return the next recorded exchange of an endpoint."""
+        position = self._positions.get(key, 0)
+        self._positions[key] = position + 1
+        return records[min(position, len(records) - 1)]
+
+    async def async_send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Return the next recorded response of the endpoint."""
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        path = urlsplit(url).path
+        if (records := self._exact.get((method, path))) is not None:
+            record = self._next((method, path), records)
+        elif (
+            records := self._normalized.get(normalize_endpoint(method, path))
+        ) is not None:
+            record = self._next(normalize_endpoint(method, path), records)
+        else:
+            _LOGGER.debug("No recorded response for %s %s", method, path)
+            return _empty_response(404)
+
+        if self.speed > 0:
+            deliver_at = max(
+                now + record["d"] / self.speed,
+                self._started + (record["t"] + record["d"]) / self.speed,
+            )
+            await asyncio.sleep(deliver_at - now)
+
+        if (error := record.get("x")) is not None:
+            if error in ("TimeoutError", "ServerTimeoutError"):
+                raise asyncio.TimeoutError
+            raise aiohttp.ClientConnectionError(f"Recorded {error}")
+        return TransportResponse(
+            record["s"],
+            "",
+            record.get("ct") or "",
+            record.get("ra"),
+            record.get("b", "").encode(),
+        )
+
+
+def make_smartlock(smartlock_id: int, name: str, auth_id: int = 1) -> dict[str, Any]:
+    """Return a /smartlock entry shaped like the real API response."""
+    return {
+        "smartlockId": smartlock_id,
+        "accountId": 1,
+        "type": 4,
+        "lmType": 0,
+        "authId": auth_id,
+        "name": name,
+        "favorite": False,
+        "firmwareVersion": 199175,
+        "hardwareVersion": 2311,
+        "serverState": 0,
+        "adminPinState": 0,
+        "virtualDevice": False,
+        "creationDate": "2024-01-01T00:00:00.000Z",
+        "updateDate": "2024-01-01T00:00:00.000Z",
+        "config": {
+            "name": name,
+            "latitude": 48.2,
+            "longitude": 16.3,
+            "autoUnlatch": False,
+            "pairingEnabled": True,
+            "buttonEnabled": True,
+            "ledEnabled": True,
+            "ledBrightness": 3,
+            "timezoneOffset": 0,
+            "daylightSavingMode": 0,
+            "fobPaired": False,
+            "fobAction1": 1,
+            "fobAction2": 2,
+            "fobAction3": 0,
+            "singleLock": False,
+            "operatingMode": 0,
+            "advertisingMode": 0,
+            "keypadPaired": True,
+            "keypad2Paired": False,
+            "homekitState": 0,
+            "matterState": 0,
+            "timezoneId": 37,
+            "deviceType": 4,
+            "wifiEnabled": True,
+        },
+        "advancedConfig": {
+            "totalDegrees": 900,
+            "singleLockedPositionOffsetDegrees": 0,
+            "unlockedToLockedTransitionOffsetDegrees": 0,
+            "lockNgoTimeout": 20,
+            "singleButtonPressAction": 1,
+            "doubleButtonPressAction": 4,
+            "detachedCylinder": False,
+            "batteryType": 3,
+            "automaticBatteryTypeDetection": True,
+            "unlatchDuration": 3,
+            "autoLockTimeout": 300,
+            "autoUnLockDisabled": False,
+            "nightModeEnabled": False,
+            "nightModeStartTime": "22:00",
+            "nightModeEndTime": "06:00",
+            "nightModeAutoLockEnabled": False,
+            "nightModeAutoUnlockDisabled": False,
+            "nightModeImmediateLockOnStart": False,
+            "autoLockEnabled": False,
+            "immediateAutoLockEnabled": False,
+            "autoUpdateEnabled": True,
+            "motorSpeed": 0,
+            "enableSlowSpeedDuringNightMode": False,
+        },
+        "state": {
+            "mode": 2,
+            "state": STATE_LOCKED,
+            "trigger": 0,
+            "lastAction": 2,
+            "batteryCritical": False,
+            "batteryCharging": False,
+            "batteryChargeState": 80,
+            "keypadBatteryCritical": False,
+            "doorsensorBatteryCritical": False,
+            "doorState": 2,
+            "ringToOpenTimer": 0,
+            "nightMode": False,
+            "operationId": None,
+        },
+    }
+
+
+# Smartlock used when no templates are given
+DEFAULT_TEMPLATE = make_smartlock(0, "Synthetic Lock")
+
+
+def load_templates(path: str) -> list[dict[str, Any]]:
+    """Return smartlock templates from a JSON list or a recording.
+
+    From a recording, the smartlocks of its last /smartlock response are
+    used.
+    """
+    if path.endswith((".jsonl", ".jsonl.gz")):
+        for record in reversed(load_recording(path)):
+            if record["m"] == "GET" and record["e"].split("?", 1)[0] == "/smartlock":
+                if record.get("s") == 200:
+                    return json_loads(record["b"])
+        raise ValueError(f"{path} contains no /smartlock response")
+    with _open(path, "r") as file:
+        return json.load(file)
+
+
+class SyntheticTransport(NukiTransport):
+    """Serve a synthetic fleet built from smartlock templates.
+
+    The templates are cycled to build `fleet_size` smartlocks with their
+    own ids and names. Every /smartlock request toggles a random `churn`
+    share of the idle locks between locked and unlocked, actions move a
+    lock through its transitional state for `action_duration` seconds,
+    and every response is delayed by `latency` seconds. The log and
+    authorization endpoints answer with empty lists.
+    """
+
+    def __init__(
+        self,
+        fleet_size: int,
+        templates: list[dict[str, Any]] | None = None,
+        latency: float = 0.0,
+        churn: float = 0.0,
+        action_duration: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the synthetic fleet."""
+        templates = templates or [DEFAULT_TEMPLATE]
+        self.latency = latency
+        self.churn = churn
+        self.action_duration = action_duration
+        self._random = random.Random(seed)
+        self.smartlocks: dict[int, dict[str, Any]] = {}
+        for index in range(fleet_size):
+            smartlock = copy.deepcopy(templates[index % len(templates)])
+            smartlock_id = (smartlock.get("type", 0) << 32) + index + 1
+            smartlock["smartlockId"] = smartlock_id
+            smartlock["name"] = f"{smartlock.get('name', 'Lock')} {index + 1}"
+            self.smartlocks[smartlock_id] = smartlock
+        self.requests = 0
+
+    def _set_state(self, smartlock_id: int, state: int) -> None:
+        """Change the Nuki state of a smartlock."""
+        smartlock = self.smartlocks[smartlock_id]
+        smartlock["state"] = {**smartlock.get("state", {}), "state": state}
+
+    def _churn(self) -> None:
+        """Toggle a random share of the idle smartlocks."""
+        if not self.churn:
+            return
+        count = round(len(self.smartlocks) * self.churn)
+        for smartlock_id in self._random.sample(list(self.smartlocks), count):
+            state = self.smartlocks[smartlock_id].get("state", {}).get("state")
+            if state == STATE_LOCKED:
+                self._set_state(smartlock_id, STATE_UNLOCKED)
+            elif state == STATE_UNLOCKED:
+                self._set_state(smartlock_id, STATE_LOCKED)
+
+    def _action(self, smartlock_id: int, action: int | None) -> TransportResponse:
+        """Start an action on a smartlock."""
+        if action not in ACTION_STATES:
+            return _empty_response(400)
+        transitional, final = ACTION_STATES[action]
+        self._set_state(smartlock_id, transitional)
+        asyncio.get_running_loop().call_later(
+            self.action_duration, self._set_state, smartlock_id, final
+        )
+        return _empty_response(204)
+
+    async def async_send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Answer a request from the synthetic fleet."""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = urlsplit(url).path
+        if path == "/smartlock" and method == "GET":
+            self._churn()
+            return _json_response(list(self.smartlocks.values()))
+        if path in ("/smartlock/log", "/smartlock/auth"):
+            return _json_response([]) if method == "GET" else _empty_response(204)
+
+        match = _SMARTLOCK_PATH.match(path)
+        if match is None or (smartlock_id := int(match[1])) not in self.smartlocks:
+            return _empty_response(404)
+        if match[2] is None and method == "GET":
+            return _json_response(self.smartlocks[smartlock_id])
+        if match[2] == "/log":
+            return _json_response([])
+        if match[2] and method == "POST":
+            if match[3] is not None:
+                return self._action(smartlock_id, ACTION_NAMES.get(match[3]))
+            return self._action(smartlock_id, json_loads(body or b"{}").get("action"))
+        return _empty_response(404)
@@ -0,0 +1,201 @@
+"""Webhook push updates for the Nuki Web API integration."""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.network import NoURLAvailableError
+
+from .api import NukiWebApiClient
+from .const import DOMAIN, WEBHOOK_FEATURES, WEBHOOK_SIGNATURE_HEADER
+from .coordinator import NukiDataUpdateCoordinator
+from .json_codec import json_loads
+from .metadata import NukiMetadataCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fields of the state model a DEVICE_MASTERDATA event may update
+MASTERDATA_FIELDS = ("name", "type")
+
+
+def account_webhook_id(api_token: str) -> str:
+    """Return the Home Assistant webhook id of an account.
+
+    Derived from the API token, so it survives restarts without being
+    stored and cannot be guessed without the token.
+    """
+    return hmac.new(
+        api_token.encode(), f"{DOMAIN} webhook".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """Check the HMAC-SHA256 signature Nuki computes over the request body."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+@callback
+def async_apply_payload(
+    coordinator: NukiDataUpdateCoordinator,
+    payload: dict[str, Any],
+    metadata: NukiMetadataCoordinator | None = None,
+) -> bool:
+    """Patch a decoded webhook event into the coordinator data.
+
+    Master data events also schedule a metadata sync. Returns False for
+    events that are not understood.
+    """
+    smartlock_id = payload.get("smartlockId")
+    if smartlock_id is None:
+        return False
+
+    feature = payload.get("feature")
+    if feature == "DEVICE_STATUS" and isinstance(payload.get("state"), dict):
+        coordinator.async_patch_smartlock(smartlock_id, {"state": payload["state"]})
+        return True
+    if feature == "DEVICE_MASTERDATA":
+        changes = {key: payload[key] for key in MASTERDATA_FIELDS if key in payload}
+        if changes:
+            coordinator.async_patch_smartlock(smartlock_id, changes)
+        if metadata is not None:
+            coordinator.hass.async_create_task(metadata.async_request_refresh())
+        return True
+    return False
+
+
+class NukiWebhook:
+    """Receive decentral webhook events of one account from the Nuki Web API."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: NukiWebApiClient,
+        coordinator: NukiDataUpdateCoordinator,
+        metadata: NukiMetadataCoordinator | None = None,
+    ) -> None:
+        """Initialize the webhook receiver."""
+        self.hass = hass
+        self.webhook_id = account_webhook_id(client.api_token)
+        self.client = client
+        self.coordinator = coordinator
+        self.metadata = metadata
+        self._secret: str | None = None
+        self._registration_id: int | None = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+    async def async_register(self) -> bool:
+        """Register the webhook locally and with the Nuki Web API.
+
+        Returns False, leaving the integration in polling mode, if Home
+        Assistant has no reachable URL or the API rejects the registration.
+        """
+        try:
+            url = webhook.async_generate_url(
+                self.hass, self.webhook_id, allow_internal=False
+            )
+        except NoURLAvailableError:
+            _LOGGER.warning(
+                "No external URL available for Nuki webhooks, using polling"
+            )
+            return False
+
+        webhook.async_register(
+            self.hass,
+            DOMAIN,
+            "Nuki Web API",
+            self.webhook_id,
+            self._async_handle_webhook,
+            allowed_methods=["POST"],
+        )
+
+        await self._async_delete_stale()
+        try:
+            registration = await self.client.register_webhook(url, WEBHOOK_FEATURES)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Error registering Nuki webhook, using polling: %s", err)
+            webhook.async_unregister(self.hass, self.webhook_id)
+            return False
+
+        self._secret = registration.get("secret")
+        self._registration_id = registration.get("id")
+        if not self._secret:
+            _LOGGER.warning("Nuki webhook registration returned no secret, using polling")
+            await self.async_unregister()
+            return False
+
+        # Entries are not unloaded when Home Assistant stops
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+        )
+        _LOGGER.debug("Registered Nuki webhook %s", self._registration_id)
+        return True
+
+    async def _async_delete_stale(self) -> None:
+        """Delete registrations of this webhook left behind by earlier runs.
+
+        They are matched by the webhook id rather than the full URL, so
+        registrations made before the external URL changed are found too.
+        Errors are logged and ignored, the new registration goes ahead.
+        """
+        suffix = f"/api/webhook/{self.webhook_id}"
+        try:
+            for registration in await self.client.get_webhooks():
+                if not str(registration.get("webhookUrl", "")).endswith(suffix):
+                    continue
+                _LOGGER.debug("Deleting stale Nuki webhook %s", registration["id"])
+                await self.client.delete_webhook(registration["id"])
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Error deleting stale Nuki webhooks: %s", err)
+
+    async def _async_handle_stop(self, event: Event) -> None:
+        """Unregister from the Nuki Web API when Home Assistant stops."""
+        self._unsub_stop = None
+        await self.async_unregister()
+
+    async def async_unregister(self) -> None:
+        """Remove the webhook locally and from the Nuki Web API."""
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        webhook.async_unregister(self.hass, self.webhook_id)
+        if self._registration_id is None:
+            return
+        try:
+            await self.client.delete_webhook(self._registration_id)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Error deleting Nuki webhook: %s", err)
+        self._registration_id = None
+        self._secret = None
+
+    async def _async_handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        """Handle a webhook event posted by the Nuki Web API."""
+        body = await request.read()
+        if self._secret is None or not verify_signature(
+            self._secret, body, request.headers.get(WEBHOOK_SIGNATURE_HEADER)
+        ):
+            _LOGGER.warning("Rejected Nuki webhook call with invalid signature")
+            return web.Response(status=401)
+
+        try:
+            payload = json_loads(body)
+        except ValueError:
+            return web.Response(status=400)
+
+        if not isinstance(payload, dict) or not async_apply_payload(
+            self.coordinator, payload, self.metadata
+        ):
+            _LOGGER.debug("Ignored Nuki webhook event: %s", payload)
+
+        return web.Response(status=200)